@@ -0,0 +1,15 @@
+"""Single entry point that serves the layout each visitor's device needs.
+
+    streamlit run app.py
+
+Desktop browsers get the game.py layout, phones and tablets (or anything
+reporting a narrow viewport) get the mobile-first game2.py layout. Image
+variants are sized per session from the same client hints, see
+horoscope/device.py.
+"""
+import game
+import game2
+from horoscope.device import session_hints
+
+app = game2 if session_hints().mobile else game
+app.main()
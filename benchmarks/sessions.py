@@ -0,0 +1,318 @@
+"""Concurrent-session load benchmark for game.py and game2.py.
+
+Every simulated visitor clicks through landing → `--signs` sign changes →
+SourcingHaus end page → back. Two drivers:
+
+    apptest    (default) streamlit.testing.v1.AppTest, in-process. AppTest
+               swaps a global runtime per run, so the N sessions are kept
+               alive side by side and their clicks interleaved on one thread.
+               Each app runs in its own child process so RSS is per app.
+    websocket  drives a running server (`streamlit run game.py`) over its
+               real websocket, all sessions concurrently:
+               --driver websocket --url ws://localhost:8501 [--server-pid PID]
+
+Reported per app: script-run latency percentiles, script runs per click,
+peak RSS, and bytes per session (websocket messages, plus media payloads
+registered by st.image in the AppTest driver). Results are written as JSON;
+pass --baseline OLD.json to print the change against an earlier run.
+
+    python benchmarks/sessions.py --sessions 50 --out bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APPS = ("game.py", "game2.py")
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "p50": pct(50), "p90": pct(90), "p99": pct(99),
+        "max": ordered[-1], "mean": statistics.fmean(ordered), "count": len(ordered),
+    }
+
+
+def scenario(app: str, signs: int) -> list[str]:
+    """Button keys one visitor clicks, in order."""
+    clicks = ["enter_button"]
+    for i in range(signs):
+        if app == "game2.py" and i % 2:
+            clicks.append(f"zodiac_{('leo', 'virgo', 'pisces', 'gemini')[i // 2 % 4]}")
+        else:
+            clicks.append("next" if i % 3 != 2 else "prev")
+    return clicks + ["learn_more_button", "return_button"]
+
+# =============================
+# ----- AppTest driver -----
+# =============================
+
+class _ByteMeter:
+    """Sums websocket (ForwardMsg) and media bytes produced by AppTest runs."""
+
+    def __init__(self):
+        from streamlit.runtime.media_file_manager import MediaFileManager
+        from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+        self.ws = 0
+        self.media = 0
+        meter = self
+        forward_msgs = LocalScriptRunner.forward_msgs
+        add = MediaFileManager.add
+
+        def counted_forward_msgs(runner):
+            msgs = forward_msgs(runner)
+            meter.ws += sum(m.ByteSize() for m in msgs)
+            return msgs
+
+        def counted_add(manager, path_or_data, *args, **kwargs):
+            if isinstance(path_or_data, (bytes, bytearray)):
+                meter.media += len(path_or_data)
+            return add(manager, path_or_data, *args, **kwargs)
+
+        LocalScriptRunner.forward_msgs = counted_forward_msgs
+        MediaFileManager.add = counted_add
+
+    def take(self) -> tuple[int, int]:
+        ws, media, self.ws, self.media = self.ws, self.media, 0, 0
+        return ws, media
+
+
+def run_apptest(app: str, sessions: int, signs: int, timeout: float) -> dict:
+    import logging
+
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    meter = _ByteMeter()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies, clicks, runs = [], 0, 0
+    ws_bytes, media_bytes = [0] * sessions, [0] * sessions
+
+    def timed_run(i: int, at):
+        start = time.perf_counter()
+        at.run(timeout=timeout)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ws, media = meter.take()
+        ws_bytes[i] += ws
+        media_bytes[i] += media
+        if at.exception:
+            raise RuntimeError(f"{app} session {i}: {at.exception}")
+
+    visitors = [AppTest.from_file(str(ROOT / app), default_timeout=timeout) for _ in range(sessions)]
+    for i, at in enumerate(visitors):
+        timed_run(i, at)
+    for key in scenario(app, signs):
+        for i, at in enumerate(visitors):
+            at.button(key=key).click()
+            timed_run(i, at)
+            clicks += 1
+    for at in visitors:
+        runs += at.session_state["router_stats"]["runs"] - 1
+
+    return {
+        "driver": "apptest",
+        "sessions": sessions,
+        "clicks": clicks,
+        "latency_ms": percentiles(latencies),
+        "reruns_per_click": runs / clicks if clicks else 0.0,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 ** 2),
+        "rss_growth_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / (1024 if sys.platform != "darwin" else 1024 ** 2),
+        "bytes_per_session": {
+            "ws": statistics.fmean(ws_bytes),
+            "media": statistics.fmean(media_bytes),
+        },
+    }
+
+
+def _apptest_child(app, sessions, signs, timeout, queue):
+    try:
+        queue.put(run_apptest(app, sessions, signs, timeout))
+    except Exception as e:  # report, don't hang the parent
+        queue.put({"error": repr(e)})
+
+# =============================
+# ----- Websocket driver -----
+# =============================
+
+async def _ws_session(url: str, app: str, signs: int, stats: dict):
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    async with websockets.connect(f"{url.rstrip('/')}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as ws:
+        received = 0
+
+        # key -> (widget id, fragment id); kept across runs like the browser's
+        # element tree, since a fragment rerun only resends its own elements
+        buttons: dict[str, tuple[str, str]] = {}
+
+        async def rerun(widget: tuple[str, str] | None):
+            """Trigger one interaction and collect the buttons it (re)draws."""
+            nonlocal received
+            msg = BackMsg()
+            msg.rerun_script.query_string = ""
+            if widget:
+                widget_id, fragment_id = widget
+                state = msg.rerun_script.widget_states.widgets.add()
+                state.id = widget_id
+                state.trigger_value = True
+                if fragment_id:
+                    msg.rerun_script.fragment_id = fragment_id
+            start = time.perf_counter()
+            await ws.send(msg.SerializeToString())
+            runs = 0
+            while True:
+                frame = await ws.recv()
+                received += len(frame)
+                fwd = ForwardMsg()
+                fwd.ParseFromString(frame)
+                kind = fwd.WhichOneof("type")
+                if kind == "new_session":
+                    runs += 1
+                elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                    element = fwd.delta.new_element
+                    if element.WhichOneof("type") == "button":
+                        buttons[element.button.id.rsplit("-", 1)[-1]] = (element.button.id, fwd.delta.fragment_id)
+                elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+            stats["latencies"].append((time.perf_counter() - start) * 1000)
+            if widget:
+                stats["runs"] += runs
+                stats["clicks"] += 1
+
+        await rerun(None)
+        for key in scenario(app, signs):
+            await rerun(buttons[key])
+        stats["bytes"].append(received)
+
+
+def run_websocket(url: str, app: str, sessions: int, signs: int, server_pid: int | None) -> dict:
+    stats = {"latencies": [], "runs": 0, "clicks": 0, "bytes": []}
+
+    async def main():
+        await asyncio.gather(*(_ws_session(url, app, signs, stats) for _ in range(sessions)))
+
+    asyncio.run(main())
+    result = {
+        "driver": "websocket",
+        "sessions": sessions,
+        "clicks": stats["clicks"],
+        "latency_ms": percentiles(stats["latencies"]),
+        "reruns_per_click": stats["runs"] / stats["clicks"] if stats["clicks"] else 0.0,
+        "bytes_per_session": {"ws": statistics.fmean(stats["bytes"]) if stats["bytes"] else 0},
+    }
+    if server_pid:
+        # VmHWM is the server's peak resident set size
+        for line in Path(f"/proc/{server_pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                result["peak_rss_mb"] = int(line.split()[1]) / 1024
+    return result
+
+# =============================
+# ----- Reporting -----
+# =============================
+
+def compare(current: dict, baseline: dict):
+    for app, result in current["apps"].items():
+        old = baseline.get("apps", {}).get(app)
+        if not old or "latency_ms" not in result or "latency_ms" not in old:
+            continue
+        print(f"{app} vs baseline:")
+        for metric in ("p50", "p90", "p99"):
+            new_v, old_v = result["latency_ms"][metric], old["latency_ms"][metric]
+            print(f"  latency {metric}: {old_v:8.1f} -> {new_v:8.1f} ms ({(new_v - old_v) / old_v * 100:+.0f}%)")
+        for metric in ("reruns_per_click", "peak_rss_mb"):
+            if metric in result and metric in old:
+                print(f"  {metric}: {old[metric]:.2f} -> {result[metric]:.2f}")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apps", nargs="+", default=list(APPS))
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--signs", type=int, default=6, help="sign changes per visitor")
+    parser.add_argument("--driver", choices=("apptest", "websocket"), default="apptest")
+    parser.add_argument("--url", default="ws://localhost:8501", help="server for the websocket driver")
+    parser.add_argument("--server-pid", type=int, help="server PID, for peak RSS with --driver websocket")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", default=os.path.join(os.environ.get("HOROSCOPE_BUILD_DIR", "build"), "bench_sessions.json"))
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    import streamlit
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "streamlit": streamlit.__version__,
+            "python": platform.python_version(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "args": vars(args),
+            "env": {k: v for k, v in os.environ.items() if k.startswith("HOROSCOPE_")},
+        },
+        "apps": {},
+    }
+    for app in args.apps:
+        if args.driver == "websocket":
+            result = run_websocket(args.url, app, args.sessions, args.signs, args.server_pid)
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            queue = ctx.Queue()
+            child = ctx.Process(target=_apptest_child, args=(app, args.sessions, args.signs, args.timeout, queue))
+            child.start()
+            result = queue.get()
+            child.join()
+        results["apps"][app] = result
+        if "error" in result:
+            print(f"{app}: {result['error']}")
+            continue
+        lat = result["latency_ms"]
+        print(
+            f"{app}: {result['sessions']} sessions, {result['clicks']} clicks | "
+            f"run p50 {lat['p50']:.1f} ms p90 {lat['p90']:.1f} ms p99 {lat['p99']:.1f} ms | "
+            f"{result['reruns_per_click']:.2f} runs/click | "
+            f"peak RSS {result.get('peak_rss_mb', float('nan')):.0f} MB | "
+            + ", ".join(f"{k} {v / 1024:.0f} KiB" for k, v in result["bytes_per_session"].items())
+            + " per session"
+        )
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps(results, indent=1), encoding="utf-8")
+    print(f"wrote {args.out}")
+    if args.baseline:
+        compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
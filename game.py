@@ -1,53 +1,47 @@
 from __future__ import annotations
-import base64
-import os
 import random
-import time
 from datetime import datetime
 from pathlib import Path
 
 import streamlit as st
 
+from horoscope.bundle import external_resource
+from horoscope.carousel import carousel_enabled, carousel_manifest, zodiac_carousel
+from horoscope.content import content_pack
+from horoscope.metrics import record_run, timed
+from horoscope.prewarm import start_prewarmer
+from horoscope.profiling import profiled
+from horoscope.render import prefetch_images, show_image
+from horoscope.device import session_layout
+from horoscope.router import Router, fragment_run
+from horoscope.run import RunContext, load_run
+from horoscope.styles import inject_stylesheet
+from horoscope.variants import LayoutProfile
+
 # =============================
 # ----- Config & Constants -----
 # =============================
 
-st.set_page_config(
-    page_title="Sustainable Public Procurement Horoscope",
-    page_icon="✨",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-ZODIAC_ORDER = [
-    "aries", "taurus", "gemini", "cancer", "leo", "virgo",
-    "libra", "scorpio", "sagittarius", "capricorn", "aquarius", "pisces",
-]
-
-ZODIAC_EMOJI = {
-    "aries": "♈️", "taurus": "♉️", "gemini": "♊️", "cancer": "♋️",
-    "leo": "♌️", "virgo": "♍️", "libra": "♎️", "scorpio": "♏️",
-    "sagittarius": "♐️", "capricorn": "♑️", "aquarius": "♒️", "pisces": "♓️",
-}
-
-# Dictionary of zodiac sources
-ZODIAC_SOURCES = {
-    "virgo": "https://www.oecd.org/en/publications/government-at-a-glance-2025_0efd0bcd-en/full-report/green-public-procurement_5dbf73a9.html#indicator-d1e19503-94cb3dc3a1",
-    "libra": "https://www.wto.org/english/news_e/news25_e/gpro_18jun25_e.htm?utm",
-    "scorpio": "https://www.irena.org/Energy-Transition/Innovation/Offshore-Renewables",
-    "sagittarius": "https://www.eib.org/en/press/all/2025-177-cities-across-europe-plan-to-bolster-climate-action-and-social-infrastructure-eib-survey-shows?utm",
-    "capricorn": "https://decarbonization.unido.org/resources/harmonizing-reporting-for-green-public-procurement-and-green-building-programs-using-ecolabels-epds/",
-    "aquarius": "https://www.adb.org/news/adb-gsa-sign-deal-open-green-data-center-thailand",
-    "pisces": "https://environment.ec.europa.eu/news/commission-launches-consultation-upcoming-circular-economy-act-2025-08-01_en",
-    "aries": "https://www.worldbank.org/en/news/press-release/2025/08/05/mobilizing-access-to-the-digital-economy-alliance-africa?utm",
-    "taurus": "https://www.fao.org/americas/news/news-detail/programa-alimentacion-escolar/en?utm",
-    "gemini": "https://www.unops.org/news-and-stories/news/unlocking-the-power-of-public-procurement?utm",
-    "cancer": "https://www.who.int/news/item/26-07-2025-who-expands-guidance-on-sexually-transmitted-infections-and-reviews-country-progress-on-policy-implementation",
-    "leo": "https://energy.ec.europa.eu/topics/energy-security/eu-energy-and-raw-materials-platform_en"
-}
+# Sign order, emoji, names, source links and captions live in content/game.json
+CONTENT_PACK = "game"
 
 DEFAULT_FOLDER = "."
 
+# Image widths as (desktop, mobile) viewport fractions - keep in sync with STARFIELD_CSS
+LAYOUT = LayoutProfile(
+    name="desktop",
+    slots={
+        "horoscope-image": (0.5, 0.8),
+        "landing-image": (0.5, 0.8),
+        "end-image": (0.5, 0.8),
+    },
+    viewport_width=1440,
+    dpr=2.0,
+)
+
+# Navigation goes through router callbacks; the router itself keeps no state
+router = Router(lambda: content_pack(CONTENT_PACK).order)
+
 # Enhanced CSS with better centering and responsiveness
 STARFIELD_CSS = """
 <style>
@@ -359,58 +353,84 @@ h1, h2, h3 { color: #f6f7fb; }
 </style>
 """
 
-st.markdown(STARFIELD_CSS, unsafe_allow_html=True)
+# =============================
+# ----- Page Markup -----
+# =============================
+
+# Page text and markup, also rendered by the static export (horoscope/export.py)
+LANDING_HEADER = """
+<div class='landing-container'>
+    <div class='landing-title'>✨ Sustainable Public Procurement Horoscope ✨</div>
+    <div class='landing-subtitle'>Discover what the stars have in store for you</div>
+</div>
+"""
+
+END_HEADER = """
+<div class='landing-container'>
+    <div class='landing-title'>✨ Sustainable Public Procurement Message ✨</div>
+    <div class='landing-subtitle'>A special message from the stars</div>
+</div>
+"""
+
+MAIN_HEADER = """
+<div class='header-glass'>
+  <div class='kicker'>Sustainable Public Procurement Horoscope</div>
+  <h1>🔮 Zodiac Wheel</h1>
+  <div class='small'>Spin through the stars to discover your destiny</div>
+</div>
+"""
+
+SELECTOR_TITLE = "🌟 Select Your Zodiac"
+ENTER_LABEL = "🚀 Enter the Horoscope Realm"
+LEARN_MORE_LABEL = "📖 Click here to learn more about SourcingHaus"
+RETURN_LABEL = "🔙 Return to Horoscope"
+
+def today_html(day: str) -> str:
+    """Today's date beside the main header"""
+    return (
+        f"<div class='header-glass'><div class='kicker'>Today</div><h3>{day}</h3>"
+        "<div class='small'>May the stars be ever in your favor ✨</div></div>"
+    )
+
+def current_sign_html(emoji: str, name: str) -> str:
+    """The picked sign between the ◀/▶ buttons"""
+    return f"""
+    <div class="current-zodiac">
+        <div style="font-size: 2.5rem;">{emoji}</div>
+        <div style="font-size: 1.2rem; font-weight: bold; color: white;">
+            {name}
+        </div>
+    </div>
+    """
 
 # =============================
 # ----- Utilities -----
 # =============================
 
-def discover_images(folder: str | os.PathLike) -> dict[str, Path]:
-    """Return a dict mapping zodiac -> Image Path if found in folder.
-    Supports JPG, JPEG, PNG, WEBP formats.
-    """
-    folder_path = Path(folder)
-    found = {}
-    if not folder_path.exists():
-        return found
-    
-    # Support multiple image formats
-    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.webp']
-    for ext in image_extensions:
-        for p in folder_path.glob(ext):
-            name = p.stem.lower().strip()
-            if name in ZODIAC_ORDER:
-                found[name] = p
-    return found
-
-def display_image(path: Path):
+@timed("display_image")
+def display_image(run: RunContext, path: Path, sign: str):
     """Display horoscope image with proper formatting and centering"""
     try:
         # Display the image with responsive sizing
         st.markdown('<div class="horoscope-image-container">', unsafe_allow_html=True)
-        st.image(
-            str(path),
-            use_container_width=True,
-            output_format="auto"
-        )
+        show_image(path, "horoscope-image", current_layout(), mtime_ns=run.assets.mtime_ns(path), assets=run.assets)
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Add some decorative elements
         st.markdown("---")
         st.markdown(
             f'<div style="text-align: center; opacity: 0.8; font-style: italic;">'
-            f'✨ The stars have spoken for {path.stem.title()}... ✨'
+            f'{run.content.caption("spoken", name=run.content.names[sign])}'
             f'</div>',
             unsafe_allow_html=True
         )
         
         # Display the source link for this zodiac sign
-        zodiac_name = path.stem.lower().strip()
-        if zodiac_name in ZODIAC_SOURCES:
-            source_url = ZODIAC_SOURCES[zodiac_name]
+        if sign in run.sources:
+            source_url = run.sources[sign]
             st.markdown(
                 f'<div class="source-link">'
-                f'<div style="font-size: 0.9rem; opacity: 0.8; margin-bottom: 0.5rem;">Learn more about sustainable procurement:</div>'
+                f'<div style="font-size: 0.9rem; opacity: 0.8; margin-bottom: 0.5rem;">{run.content.caption("source_label")}</div>'
                 f'<a href="{source_url}" target="_blank">{source_url}</a>'
                 f'</div>',
                 unsafe_allow_html=True
@@ -424,12 +444,13 @@ def display_image(path: Path):
 # ----- Simple Scroll Selector -----
 # =============================
 
-def create_scroll_selector():
+@timed("create_scroll_selector")
+def create_scroll_selector(run: RunContext):
     """Create a simple scroll-like selector"""
-    st.markdown("### 🌟 Select Your Zodiac")
+    st.markdown(f"### {SELECTOR_TITLE}")
     
     # Current selection display
-    current_idx = ZODIAC_ORDER.index(st.session_state["picked_sign"])
+    current_idx = run.content.order.index(st.session_state["picked_sign"])
     
     # Show scroll selector with proper vertical alignment
     st.markdown('<div class="center-container">', unsafe_allow_html=True)
@@ -439,53 +460,46 @@ def create_scroll_selector():
     with col1:
         # Use a container to center the button vertically
         st.markdown('<div class="arrow-container">', unsafe_allow_html=True)
-        if st.button("◀", key="prev", use_container_width=True):
-            prev_idx = (current_idx - 1) % len(ZODIAC_ORDER)
-            st.session_state["picked_sign"] = ZODIAC_ORDER[prev_idx]
-            st.rerun()
+        st.button("◀", key="prev", use_container_width=True, on_click=router.fire, args=("prev",))
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
-        st.markdown(f"""
-        <div class="current-zodiac">
-            <div style="font-size: 2.5rem;">{ZODIAC_EMOJI[st.session_state['picked_sign']]}</div>
-            <div style="font-size: 1.2rem; font-weight: bold; color: white;">
-                {st.session_state['picked_sign'].title()}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        picked = st.session_state["picked_sign"]
+        st.markdown(current_sign_html(run.content.emoji[picked], run.content.names[picked]), unsafe_allow_html=True)
     
     with col3:
         # Use a container to center the button vertically
         st.markdown('<div class="arrow-container">', unsafe_allow_html=True)
-        if st.button("▶", key="next", use_container_width=True):
-            next_idx = (current_idx + 1) % len(ZODIAC_ORDER)
-            st.session_state["picked_sign"] = ZODIAC_ORDER[next_idx]
-            st.rerun()
+        st.button("▶", key="next", use_container_width=True, on_click=router.fire, args=("next",))
         st.markdown('</div>', unsafe_allow_html=True)
 
+    # Warm the browser cache with the signs ◀/▶ lead to
+    neighbours = [
+        run.content.order[(current_idx - 1) % len(run.content.order)],
+        run.content.order[(current_idx + 1) % len(run.content.order)],
+    ]
+    prefetch_images([run.found[s] for s in neighbours if s in run.found], "horoscope-image", current_layout(), run.assets)
+
 # =============================
 # ----- End Image Page -----
 # =============================
 
-def show_end_image_page():
+@timed("show_end_image_page")
+def show_end_image_page(run: RunContext):
     """Display the end image on a separate page"""
-    st.markdown("""
-    <div class='landing-container'>
-        <div class='landing-title'>✨ Sustainable Public Procurement Message ✨</div>
-        <div class='landing-subtitle'>A special message from the stars</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(END_HEADER, unsafe_allow_html=True)
     
     # Display end image
-    end_path = Path(DEFAULT_FOLDER) / "end.jpeg"
-    if end_path.exists():
+    end_path = run.assets.get("end.jpeg")
+    if end_path:
         st.markdown('<div class="end-image-container">', unsafe_allow_html=True)
-        st.image(
-            str(end_path),
-            use_container_width=True,
-            output_format="auto",
-            caption="A special message for sustainable procurement 🌱"
+        show_image(
+            end_path,
+            "end-image",
+            current_layout(),
+            caption=run.content.caption("end"),
+            mtime_ns=run.assets.mtime_ns(end_path),
+            assets=run.assets,
         )
         st.markdown('</div>', unsafe_allow_html=True)
     else:
@@ -495,51 +509,48 @@ def show_end_image_page():
     st.markdown('<div class="center-container">', unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button(
-            "🔙 Return to Horoscope",
+        st.button(
+            RETURN_LABEL,
             key="return_button",
-            use_container_width=True
-        ):
-            st.session_state["show_end_image"] = False
-            st.rerun()
+            use_container_width=True,
+            on_click=router.fire,
+            args=("return",),
+        )
     st.markdown('</div>', unsafe_allow_html=True)
 
 # =============================
 # ----- Landing Page -----
 # =============================
 
-def show_landing_page():
+@timed("show_landing_page")
+def show_landing_page(run: RunContext):
     """Display the landing page with intro image and entry button"""
-    st.markdown("""
-    <div class='landing-container'>
-        <div class='landing-title'>✨ Sustainable Public Procurement Horoscope ✨</div>
-        <div class='landing-subtitle'>Discover what the stars have in store for you</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(LANDING_HEADER, unsafe_allow_html=True)
     
     # Add the enter button above the image
     st.markdown('<div class="center-container">', unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button(
-            "🚀 Enter the Horoscope Realm",
+        st.button(
+            ENTER_LABEL,
             key="enter_button",
-            use_container_width=True
-        ):
-            st.session_state["game_started"] = True
-            st.session_state["show_end_image"] = False
-            st.rerun()
+            use_container_width=True,
+            on_click=router.fire,
+            args=("enter",),
+        )
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Display intro image with responsive sizing and centering
-    intro_path = Path(DEFAULT_FOLDER) / "intro.jpeg"
-    if intro_path.exists():
+    intro_path = run.assets.get("intro.jpeg")
+    if intro_path:
         st.markdown('<div class="landing-image-container">', unsafe_allow_html=True)
-        st.image(
-            str(intro_path),
-            use_container_width=True,
-            output_format="auto",
-            caption="Welcome to your sustainable journey 🌱"
+        show_image(
+            intro_path,
+            "landing-image",
+            current_layout(),
+            caption=run.content.caption("landing"),
+            mtime_ns=run.assets.mtime_ns(intro_path),
+            assets=run.assets,
         )
         st.markdown('</div>', unsafe_allow_html=True)
     else:
@@ -550,67 +561,36 @@ def show_landing_page():
 # ----- Main Game Page -----
 # =============================
 
-def show_main_game():
-    """Display the main horoscope game"""
-    # Main header
-    col_title, col_info = st.columns([0.7, 0.3])
-    with col_title:
-        st.markdown("""
-        <div class='header-glass'>
-          <div class='kicker'>Sustainable Public Procurement Horoscope</div>
-          <h1>🔮 Zodiac Wheel</h1>
-          <div class='small'>Spin through the stars to discover your destiny</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col_info:
-        now = datetime.now().strftime("%b %d, %Y")
-        st.markdown(
-            f"<div class='header-glass'><div class='kicker'>Today</div><h3>{now}</h3><div class='small'>May the stars be ever in your favor ✨</div></div>",
-            unsafe_allow_html=True,
-        )
-
-    # Add the SourcingHaus button at the top
-    st.markdown('<div class="center-container">', unsafe_allow_html=True)
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        if st.button(
-            "📖 Click here to learn more about SourcingHaus",
-            key="learn_more_button",
-            use_container_width=True
-        ):
-            st.session_state["show_end_image"] = True
-            st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    # Zodiac Selection
-    create_scroll_selector()
-
+def show_content_panel(run: RunContext):
+    """Display the card, caption and source link of the picked sign"""
     # Content area - Simplified single column layout
     st.markdown("<div class='content-panel'>", unsafe_allow_html=True)
 
     choice = st.session_state["picked_sign"]
-    path = found.get(choice)
+    path = run.found.get(choice)
 
-    if path and path.exists():
-        display_image(path)
+    if path:
+        display_image(run, path, choice)
     else:
         st.markdown("### 🖼️ Your horoscope will appear here")
-        st.caption("Add the image file and pick your sign to begin ✨")
-        st.markdown('<div class="horoscope-image-container">', unsafe_allow_html=True)
-        st.image(
-            "https://upload.wikimedia.org/wikipedia/commons/thumb/2/2e/Zodiac_Clock_-_detail.jpg/640px-Zodiac_Clock_-_detail.jpg",
-            use_container_width=True,
-            caption="(Placeholder image loaded from Wikipedia)",
-        )
-        st.markdown('</div>', unsafe_allow_html=True)
+        st.caption(run.content.caption("missing"))
+        # Vendored copy when bundled for offline use, see horoscope/bundle.py
+        placeholder = external_resource("zodiac-clock-640.jpg", DEFAULT_FOLDER)
+        if placeholder:
+            st.markdown('<div class="horoscope-image-container">', unsafe_allow_html=True)
+            st.image(
+                placeholder,
+                use_container_width=True,
+                caption=run.content.caption("placeholder"),
+            )
+            st.markdown('</div>', unsafe_allow_html=True)
         
         # Display source link even if no image is found
-        if choice in ZODIAC_SOURCES:
-            source_url = ZODIAC_SOURCES[choice]
+        if choice in run.sources:
+            source_url = run.sources[choice]
             st.markdown(
                 f'<div class="source-link">'
-                f'<div style="font-size: 0.9rem; opacity: 0.8; margin-bottom: 0.5rem;">Learn more about sustainable procurement:</div>'
+                f'<div style="font-size: 0.9rem; opacity: 0.8; margin-bottom: 0.5rem;">{run.content.caption("source_label")}</div>'
                 f'<a href="{source_url}" target="_blank">{source_url}</a>'
                 f'</div>',
                 unsafe_allow_html=True
@@ -618,6 +598,63 @@ def show_main_game():
 
     st.markdown("</div>", unsafe_allow_html=True)  # Close content-panel
 
+@router.fragment("game")
+@timed("show_sign_section")
+def show_sign_section(run: RunContext):
+    """Selector and card: ◀/▶ and sign clicks rerun only this section"""
+    if fragment_run():
+        # main() was skipped; pick up a swapped content pack or image folder
+        router.init_state()
+        run = load_run(DEFAULT_FOLDER, CONTENT_PACK)
+    create_scroll_selector(run)
+    show_content_panel(run)
+
+@timed("show_main_game")
+def show_main_game(run: RunContext):
+    """Display the main horoscope game"""
+    # Main header
+    col_title, col_info = st.columns([0.7, 0.3])
+    with col_title:
+        st.markdown(MAIN_HEADER, unsafe_allow_html=True)
+
+    with col_info:
+        now = datetime.now().strftime("%b %d, %Y")
+        st.markdown(today_html(now), unsafe_allow_html=True)
+
+    # Add the SourcingHaus button at the top
+    st.markdown('<div class="center-container">', unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.button(
+            LEARN_MORE_LABEL,
+            key="learn_more_button",
+            use_container_width=True,
+            on_click=router.fire,
+            args=("learn_more",),
+        )
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Zodiac Selection
+    if carousel_enabled():
+        # Navigation happens in the browser, so ◀/▶ cost no rerun
+        picked = zodiac_carousel(
+            carousel_manifest(
+                run.content.order,
+                run.content.emoji,
+                run.sources,
+                run.found,
+                "horoscope-image",
+                current_layout(),
+                names=run.content.names,
+                caption=run.content.caption,
+            ),
+            initial=st.session_state["picked_sign"],
+        )
+        if picked:
+            st.session_state["picked_sign"] = picked
+    else:
+        show_sign_section(run)
+
     # Footer
     st.markdown('<div class="footer">', unsafe_allow_html=True)
     st.markdown("Discover your sustainable procurement destiny through the stars ✨")
@@ -631,23 +668,40 @@ def show_main_game():
 # ----- Main App -----
 # =============================
 
-# Initialize session state
-if "game_started" not in st.session_state:
-    st.session_state["game_started"] = False
-
-if "picked_sign" not in st.session_state:
-    st.session_state["picked_sign"] = "aries"
-
-if "show_end_image" not in st.session_state:
-    st.session_state["show_end_image"] = False
-
-# Discover images in default folder
-found = discover_images(DEFAULT_FOLDER)
+def current_layout() -> LayoutProfile:
+    """LAYOUT tuned to this session's viewport, DPR and Save-Data"""
+    return session_layout(LAYOUT)
+
+@profiled("game")
+@timed("main")
+def main():
+    """Run the app once; also the entry point used by app.py"""
+    st.set_page_config(
+        page_title="Sustainable Public Procurement Horoscope",
+        page_icon="✨",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+    record_run("game")
+    with timed("stylesheet"):
+        inject_stylesheet(STARFIELD_CSS, DEFAULT_FOLDER)
+
+    # Initialize session state
+    router.init_state()
+    router.begin_run()
+
+    run = load_run(DEFAULT_FOLDER, CONTENT_PACK)
+
+    # Ready each day's scheduled images shortly before midnight
+    start_prewarmer(DEFAULT_FOLDER, CONTENT_PACK, (LAYOUT,))
+
+    # Show appropriate page based on game state
+    if router.page == "landing":
+        show_landing_page(run)
+    elif router.page == "end":
+        show_end_image_page(run)
+    else:
+        show_main_game(run)
 
-# Show appropriate page based on game state
-if not st.session_state["game_started"]:
-    show_landing_page()
-elif st.session_state["show_end_image"]:
-    show_end_image_page()
-else:
-    show_main_game()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Shared helpers for the Sustainable Public Procurement Horoscope apps.
+
+`game.py` (desktop layout) and `game2.py` (mobile-first layout) import from
+here so asset handling lives in one place.
+
+Generated files go to HOROSCOPE_BUILD_DIR (default `build/`), not into the
+asset folder next to the images.
+
+Streamlit only configures its own loggers, so the "horoscope.*" ones (router
+transitions, profiling, pre-warm) print nothing unless HOROSCOPE_LOG_LEVEL is
+set, e.g. HOROSCOPE_LOG_LEVEL=INFO, which sends them to stderr.
+"""
+import logging
+import os
+
+BUILD_DIR = os.environ.get("HOROSCOPE_BUILD_DIR", "build")
+LOG_LEVEL = os.environ.get("HOROSCOPE_LOG_LEVEL", "").upper()
+
+if LOG_LEVEL:
+    _logger = logging.getLogger("horoscope")
+    if not _logger.handlers:
+        _handler = logging.StreamHandler()
+        _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        _logger.addHandler(_handler)
+    _logger.setLevel(LOG_LEVEL)
+    # The launcher configures the root logger too; print each line once
+    _logger.propagate = False
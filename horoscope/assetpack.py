@@ -0,0 +1,206 @@
+"""One memory-mapped file holding every image and variant of a folder.
+
+    python -m horoscope.assetpack [folder]
+
+writes `build/assets.pack` (see HOROSCOPE_BUILD_DIR) for the folder: the
+originals and their `.variants/` concatenated into one blob, with an offset
+index. The pack records which folder it was built from and is ignored for
+any other. Each process maps the pack once and hands out `memoryview` slices of it:
+
+- one open file per process however many images are shown
+- the OS page cache holds a single copy shared by every worker process
+- the static asset server writes slices straight to the socket, without
+  copying them into Python bytes first
+
+`st.image` and the shared media store need real `bytes`; they copy a slice
+once into the image cache instead of opening and reading the file.
+
+Every lookup passes the mtime of the file it would otherwise read, and an
+entry packed from another version of that file is a miss, so a stale pack
+only costs the old behaviour. Re-run the command after changing images. Layout, little-endian::
+
+    b"HSPACK01" | index offset (u64) | index length (u64) | data ... | index (JSON)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+import streamlit as st
+
+from horoscope import BUILD_DIR
+from horoscope.registry import CHECK_INTERVAL
+from horoscope.variants import IMAGE_EXTENSIONS, VARIANT_DIR, iter_images
+
+logger = logging.getLogger("horoscope.assetpack")
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+PACK_NAME = os.environ.get("HOROSCOPE_ASSET_PACK", "assets.pack")
+
+MAGIC = b"HSPACK01"
+HEADER = struct.Struct("<8sQQ")
+ALIGN = 64
+
+# relative path -> (offset, length, mtime_ns)
+PackIndex = dict[str, tuple[int, int, int]]
+
+
+def pack_path(folder: str | os.PathLike) -> Path:
+    """Where the pack of `folder` lives; relative build dirs are under it."""
+    return Path(folder) / BUILD_DIR / PACK_NAME
+
+
+def pack_files(folder: str | os.PathLike) -> list[Path]:
+    """Originals and their variants, in pack order."""
+    folder = Path(folder)
+    files = iter_images(folder)
+    variants = folder / VARIANT_DIR
+    if variants.is_dir():
+        files += sorted(p for p in variants.iterdir() if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+    return files
+
+
+def build_pack(folder: str | os.PathLike, target: str | os.PathLike | None = None) -> Path:
+    """Write the pack of `folder` atomically and return its path."""
+    folder = Path(folder)
+    target = Path(target) if target else pack_path(folder)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    index: dict[str, list[int]] = {}
+    with open(tmp, "wb") as out:
+        out.write(b"\0" * HEADER.size)
+        for path in pack_files(folder):
+            offset = -(-out.tell() // ALIGN) * ALIGN
+            out.write(b"\0" * (offset - out.tell()))
+            data = path.read_bytes()
+            out.write(data)
+            index[path.relative_to(folder).as_posix()] = [offset, len(data), path.stat().st_mtime_ns]
+        index_offset = out.tell()
+        raw = json.dumps({"folder": str(folder.resolve()), "files": index}, separators=(",", ":")).encode()
+        out.write(raw)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, index_offset, len(raw)))
+    os.replace(tmp, target)
+    return target
+
+
+class AssetPack:
+    """A mapped pack file serving zero-copy slices by source path."""
+
+    def __init__(self, folder: str | os.PathLike, path: str | os.PathLike):
+        self.folder = Path(folder)
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._view: memoryview | None = None
+        self._index: PackIndex = {}
+        self._stat: tuple[int, int] | None = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            self._view, self._index, self._stat = None, {}, None
+            return
+        if self._stat == (stat.st_mtime_ns, stat.st_size):
+            return
+        with open(self.path, "rb") as f:
+            # The mapping outlives the descriptor; old slices stay valid after a swap
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            logger.error("%s is not an asset pack", self.path)
+            return
+        meta = json.loads(mapped[index_offset:index_offset + index_length])
+        if meta.get("folder") != str(self.folder.resolve()):
+            logger.error("%s was built for %s, not %s", self.path, meta.get("folder"), self.folder)
+            return
+        index = {name: tuple(entry) for name, entry in meta["files"].items()}
+        stale = 0
+        for name, (_, _, mtime_ns) in index.items():
+            try:
+                stale += (self.folder / name).stat().st_mtime_ns != mtime_ns
+            except OSError:
+                pass  # shipped only in the pack
+        if stale:
+            logger.warning("%d of %d packed file(s) changed on disk; rebuild %s", stale, len(index), self.path)
+        self._view, self._index, self._stat = memoryview(mapped), index, (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self):
+        """Re-map the pack if it was rebuilt, at most every CHECK_INTERVAL seconds."""
+        now = time.monotonic()
+        if now - self._checked < CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked = now
+            self._load()
+
+    def get(self, path: Path, mtime_ns: int) -> memoryview | None:
+        """Zero-copy bytes of `path`, or None when it is not packed or the
+        pack holds another version than `mtime_ns`, the mtime of the file
+        on disk. Checked on every call, since files change under a pack
+        that does not.
+        """
+        self.refresh()
+        view, index = self._view, self._index
+        try:
+            entry = index.get(path.relative_to(self.folder).as_posix()) if view is not None else None
+        except ValueError:
+            entry = None
+        if entry is None or entry[2] != mtime_ns:
+            self.misses += 1
+            return None
+        self.hits += 1
+        offset, length, _ = entry
+        return view[offset:offset + length]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "files": len(self._index),
+            "bytes": self._stat[1] if self._stat else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def get_asset_pack(folder: str) -> AssetPack:
+    """Return the process-wide mapping of `folder`'s pack (empty if none)."""
+    return AssetPack(folder, pack_path(folder))
+
+
+def packed_bytes(path: Path, mtime_ns: int) -> memoryview | None:
+    """Slice of `path` from its folder's pack if it was packed from the
+    version with `mtime_ns`; the pack of the original's folder also holds
+    the `.variants/` next to it.
+    """
+    folder = path.parent.parent if path.parent.name == VARIANT_DIR else path.parent
+    return get_asset_pack(str(folder)).get(path, mtime_ns)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Pack a folder's images into one memory-mappable file.")
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--out", help=f"pack file (default: <folder>/{BUILD_DIR}/{PACK_NAME})")
+    args = parser.parse_args(argv)
+
+    target = build_pack(args.folder, args.out)
+    pack = AssetPack(args.folder, target)
+    print(f"wrote {target}: {pack.stats()['files']} file(s), {pack.stats()['bytes'] / 1024 / 1024:.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+"""Offline asset bundle: vendor every external resource the apps render.
+
+Every off-host resource a render path uses is declared in
+`EXTERNAL_RESOURCES` and looked up through `external_resource`, which prefers
+the local copy in `<folder>/build/vendor/`. With HOROSCOPE_OFFLINE=1 a resource
+that is not vendored is never fetched remotely; the caller gets None.
+
+    python -m horoscope.bundle vendor [folder]   # download into build/vendor/
+    python -m horoscope.bundle verify [folder]   # exit 1 if anything is off-host
+
+`verify` checks that every declared resource is vendored with the recorded
+hash, and scans the app sources and component frontends for render-time
+references to remote URLs (st.image literals, src=, <link href>, url(),
+@import). Plain `<a href>` links are navigation, not rendering, and allowed.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import urllib.request
+from pathlib import Path
+
+from horoscope import BUILD_DIR
+
+# local file name -> remote URL
+EXTERNAL_RESOURCES = {
+    "zodiac-clock-640.jpg": "https://upload.wikimedia.org/wikipedia/commons/thumb/2/2e/Zodiac_Clock_-_detail.jpg/640px-Zodiac_Clock_-_detail.jpg",
+}
+
+VENDOR_DIR = os.path.join(BUILD_DIR, "vendor")
+LOCK_FILE = "vendor.lock.json"
+OFFLINE = os.environ.get("HOROSCOPE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+USER_AGENT = "horoscope-bundle/1.0 (offline asset vendoring)"
+
+# Files whose string literals may end up in the rendered page
+SCAN_GLOBS = ("*.py", "horoscope/*.py", "horoscope/frontend/**/*.html")
+
+REMOTE_RENDER_PATTERNS = (
+    re.compile(r"""\bsrc\s*=\s*["']?(https?:)?//""", re.IGNORECASE),
+    re.compile(r"""<link\b[^>]*\bhref\s*=\s*["']?(https?:)?//""", re.IGNORECASE),
+    re.compile(r"""url\(\s*["']?(https?:)?//""", re.IGNORECASE),
+    re.compile(r"""@import\s+(url\()?\s*["']?(https?:)?//""", re.IGNORECASE),
+)
+
+
+def vendor_path(name: str, folder: str | os.PathLike = ".") -> Path:
+    return Path(folder) / VENDOR_DIR / name
+
+
+def external_resource(name: str, folder: str | os.PathLike = ".") -> str | None:
+    """Return the local copy of resource `name` if vendored, else its URL.
+    In offline mode an unvendored resource gives None.
+    """
+    local = vendor_path(name, folder)
+    if local.exists():
+        return str(local)
+    return None if OFFLINE else EXTERNAL_RESOURCES[name]
+
+# =============================
+# ----- Vendoring -----
+# =============================
+
+def vendor(folder: str | os.PathLike = ".", force: bool = False) -> dict[str, dict]:
+    """Download every external resource into `<folder>/build/vendor/`."""
+    target = Path(folder) / VENDOR_DIR
+    target.mkdir(parents=True, exist_ok=True)
+    lock = {}
+    for name, url in EXTERNAL_RESOURCES.items():
+        path = target / name
+        if force or not path.exists():
+            request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+            with urllib.request.urlopen(request, timeout=30) as response:
+                data = response.read()
+            tmp = path.with_name(f".{name}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        lock[name] = {"url": url, "sha256": hashlib.sha256(path.read_bytes()).hexdigest()}
+    (target / LOCK_FILE).write_text(json.dumps(lock, indent=1, sort_keys=True), encoding="utf-8")
+    return lock
+
+# =============================
+# ----- Verification -----
+# =============================
+
+def _st_image_literals(source: str) -> list[tuple[int, str]]:
+    """(line, url) for st.image calls whose image argument is a remote literal."""
+    found = []
+    for node in ast.walk(ast.parse(source)):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+            continue
+        if node.func.attr != "image" or not node.args:
+            continue
+        arg = node.args[0]
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str) and re.match(r"(https?:)?//", arg.value):
+            found.append((node.lineno, arg.value))
+    return found
+
+
+def scan_sources(root: str | os.PathLike = ".") -> list[str]:
+    """Return a description of every render-time remote reference under `root`."""
+    problems = []
+    root_path = Path(root)
+    files = sorted({p for pattern in SCAN_GLOBS for p in root_path.glob(pattern)})
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        rel = path.relative_to(root_path)
+        if path.suffix == ".py":
+            for line, url in _st_image_literals(text):
+                problems.append(f"{rel}:{line}: st.image loads {url}")
+        for pattern in REMOTE_RENDER_PATTERNS:
+            for match in pattern.finditer(text):
+                line = text.count("\n", 0, match.start()) + 1
+                problems.append(f"{rel}:{line}: remote reference {match.group(0)!r}")
+    return problems
+
+
+def verify(folder: str | os.PathLike = ".", root: str | os.PathLike = ".") -> list[str]:
+    """Return every reason the apps could not render fully offline."""
+    problems = []
+    lock_path = Path(folder) / VENDOR_DIR / LOCK_FILE
+    lock = json.loads(lock_path.read_text(encoding="utf-8")) if lock_path.exists() else {}
+    for name, url in EXTERNAL_RESOURCES.items():
+        path = vendor_path(name, folder)
+        if not path.exists():
+            problems.append(f"{name}: not vendored (from {url})")
+        elif lock.get(name, {}).get("sha256") != hashlib.sha256(path.read_bytes()).hexdigest():
+            problems.append(f"{name}: vendored copy does not match {LOCK_FILE}")
+
+    from horoscope.static import ASSET_BASE_URL
+
+    if ASSET_BASE_URL and not re.match(r"https?://(localhost|127\.0\.0\.1)(:|/|$)", ASSET_BASE_URL):
+        problems.append(f"HOROSCOPE_ASSET_BASE_URL points off-host: {ASSET_BASE_URL}")
+    return problems + scan_sources(root)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Vendor and verify external resources.")
+    parser.add_argument("command", choices=("vendor", "verify"))
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--force", action="store_true", help="re-download vendored files")
+    args = parser.parse_args(argv)
+
+    if args.command == "vendor":
+        for name in vendor(args.folder, force=args.force):
+            print(f"vendored {name}")
+        return 0
+
+    problems = verify(args.folder)
+    for problem in problems:
+        print(problem)
+    print("offline bundle OK" if not problems else f"{len(problems)} problem(s)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
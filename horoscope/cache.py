@@ -0,0 +1,104 @@
+"""Byte-budgeted LRU cache for encoded image payloads.
+
+Entries are keyed by (path, mtime_ns, variant) so a replaced file never
+serves stale bytes. The budget comes from HOROSCOPE_IMAGE_CACHE_MB (default
+64 MB); least recently used entries are evicted once it is exceeded.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+import streamlit as st
+
+from horoscope.assetpack import packed_bytes
+
+CACHE_BUDGET_MB = float(os.environ.get("HOROSCOPE_IMAGE_CACHE_MB", "64"))
+
+CacheKey = tuple[str, int, str]
+
+
+class ImageCache:
+    """Thread-safe LRU map of cache key -> bytes with a total size budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[CacheKey, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: CacheKey, data: bytes):
+        """Store `data`; payloads larger than the whole budget are not cached."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_load(self, key: CacheKey, loader: Callable[[], bytes]) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = loader()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Counters for sizing the budget."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_image_cache() -> ImageCache:
+    """Return the process-wide image cache."""
+    return ImageCache(int(CACHE_BUDGET_MB * 1024 * 1024))
+
+
+def load_image_bytes(path: Path, mtime_ns: int, variant: Path | None = None) -> bytes:
+    """Return the bytes of `variant` (or `path` itself) through the cache.
+    Misses are read from the folder's asset pack when it holds the version
+    of the file that is on disk.
+    """
+    source = variant or path
+
+    def load() -> bytes:
+        view = packed_bytes(source, source.stat().st_mtime_ns)
+        return bytes(view) if view is not None else source.read_bytes()
+
+    key = (str(path), mtime_ns, source.name)
+    return get_image_cache().get_or_load(key, load)
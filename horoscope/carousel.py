@@ -0,0 +1,84 @@
+"""Client-side zodiac carousel that navigates without server reruns.
+
+With HOROSCOPE_SELECTOR=carousel (and static asset mode, which provides
+cacheable image URLs) the apps replace the ◀/▶ buttons and the content panel
+with a bundled component. It receives the manifest of all 12 signs once and
+moves between them entirely in the browser. By default it never reports back;
+the browser remembers the sign across page changes on its own. Pass
+report="change" to receive each selection in Python.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable, Mapping, Sequence
+
+import streamlit.components.v1 as components
+
+from horoscope.content import CAPTIONS
+from horoscope.render import static_image_sources
+from horoscope.static import static_mode
+from horoscope.variants import LayoutProfile
+
+SELECTOR = os.environ.get("HOROSCOPE_SELECTOR", "buttons").lower()
+
+_FRONTEND = Path(__file__).parent / "frontend" / "carousel"
+_component = components.declare_component("zodiac_carousel", path=str(_FRONTEND))
+
+
+def carousel_enabled() -> bool:
+    return SELECTOR == "carousel" and static_mode()
+
+
+def _default_caption(key: str, **values: str) -> str:
+    return CAPTIONS[key].format(**values)
+
+
+def carousel_manifest(
+    order: Sequence[str],
+    emoji: Mapping[str, str],
+    sources: Mapping[str, str],
+    found: dict[str, Path],
+    slot: str,
+    profile: LayoutProfile,
+    names: Mapping[str, str] | None = None,
+    caption: Callable[..., str] = _default_caption,
+) -> list[dict]:
+    """Describe every sign for the component: name, emoji, image URLs, source
+    and the captions around them. `caption` is the content pack's
+    `ContentPack.caption`; the default uses the built-in CAPTIONS.
+    """
+    desktop, mobile = profile.slots.get(slot, (1.0, 1.0))
+    source_label = caption("source_label")
+    manifest = []
+    for key in order:
+        name = (names or {}).get(key, key.title())
+        entry = {
+            "key": key,
+            "name": name,
+            "emoji": emoji.get(key, ""),
+            "spoken": caption("spoken", name=name),
+            "source": sources.get(key, ""),
+            "sourceLabel": source_label,
+            "cssWidth": f"{desktop * 100:g}%",
+            "cssMobileWidth": f"{mobile * 100:g}%",
+        }
+        if key in found:
+            entry.update(static_image_sources(found[key], slot, profile) or {})
+        manifest.append(entry)
+    return manifest
+
+
+def zodiac_carousel(
+    signs: list[dict],
+    initial: str,
+    grid: bool = False,
+    report: str = "never",
+    key: str = "zodiac_carousel",
+) -> str | None:
+    """Render the carousel and return the reported sign, if any.
+
+    `initial` is the server's current pick; the browser keeps its own
+    selection unless this value changes. `grid` adds the 12-sign button grid.
+    """
+    return _component(signs=signs, initial=initial, grid=grid, report=report, key=key, default=None)
@@ -0,0 +1,361 @@
+"""Content packs: sign order, emoji, display names, source links and captions.
+
+A pack is a JSON (or TOML) file, `content/<name>.json` by default::
+
+    {
+      "name": "procurement-2025",
+      "signs": [
+        {"key": "aries", "emoji": "♈️", "name": "Aries", "source": "https://..."},
+        ...
+      ],
+      "captions": {"landing": "...", "spoken": "✨ The stars have spoken for {name}... ✨"},
+      "schedule": [
+        {"sign": "aries", "from": "2025-12-01", "until": "2025-12-31",
+         "image": "aries-winter.jpeg", "source": "https://..."},
+        ...
+      ]
+    }
+
+Signs are listed in wheel order. Missing captions fall back to CAPTIONS.
+Schedule entries swap a sign's image and/or source for an inclusive date
+range (`until` may be omitted for open-ended); ranges of one sign must not
+overlap. They are compiled into a per-sign interval index, so resolving a
+day is one bisect per sign.
+A pack is validated and compiled once into an immutable `ContentPack` shared
+by every session. The file is re-checked at most every
+HOROSCOPE_CONTENT_CHECK_INTERVAL seconds (default 2). An edited pack is
+swapped in atomically for the next interaction of every session, without
+rerunning anyone's script. A pack that fails validation is logged and the
+previous one stays live.
+
+Settings:
+    HOROSCOPE_CONTENT_DIR              folder of packs (default: content)
+    HOROSCOPE_CONTENT_PACK             pack name overriding each app's own
+    HOROSCOPE_CONTENT_CHECK_INTERVAL   seconds between file checks
+
+Validate a pack before shipping it with::
+
+    python -m horoscope.content check content/game.json
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+import streamlit as st
+
+logger = logging.getLogger("horoscope.content")
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+CONTENT_DIR = os.environ.get("HOROSCOPE_CONTENT_DIR", "content")
+CONTENT_PACK = os.environ.get("HOROSCOPE_CONTENT_PACK", "")
+CHECK_INTERVAL = float(os.environ.get("HOROSCOPE_CONTENT_CHECK_INTERVAL", "2"))
+PACK_SUFFIXES = (".json", ".toml")
+
+CAPTIONS = {
+    "landing": "Welcome to your sustainable journey 🌱",
+    "end": "A special message for sustainable procurement 🌱",
+    "missing": "Add the image file and pick your sign to begin ✨",
+    "placeholder": "(Placeholder image from Wikimedia Commons)",
+    "spoken": "✨ The stars have spoken for {name}... ✨",
+    "source_label": "Learn more about sustainable procurement:",
+}
+
+KEY_PATTERN = re.compile(r"^[a-z][a-z0-9_-]*$")
+
+
+class ContentError(ValueError):
+    """A content pack is malformed."""
+
+
+@dataclass(frozen=True)
+class Sign:
+    key: str
+    emoji: str
+    name: str
+    source: str | None
+
+
+@dataclass(frozen=True)
+class Card:
+    """One scheduled image/source for a sign, valid from `start` to `end`."""
+    sign: str
+    start: date
+    end: date | None
+    image: str | None
+    source: str | None
+
+
+class ScheduleIndex:
+    """Per-sign sorted, non-overlapping date intervals."""
+
+    def __init__(self, cards: list[Card] = ()):
+        by_sign: dict[str, list[Card]] = {}
+        for card in sorted(cards, key=lambda c: (c.sign, c.start)):
+            previous = by_sign.get(card.sign, [None])[-1]
+            if previous is not None and (previous.end is None or previous.end >= card.start):
+                raise ContentError(f"schedule: {card.sign} entries from {previous.start} and {card.start} overlap")
+            by_sign.setdefault(card.sign, []).append(card)
+        self._cards = {sign: tuple(cards) for sign, cards in by_sign.items()}
+        self._starts = {sign: [c.start for c in cards] for sign, cards in by_sign.items()}
+        self._days: dict[date, dict[str, Card]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(cards) for cards in self._cards.values())
+
+    def lookup(self, sign: str, day: date) -> Card | None:
+        starts = self._starts.get(sign)
+        if not starts:
+            return None
+        i = bisect.bisect_right(starts, day) - 1
+        if i < 0:
+            return None
+        card = self._cards[sign][i]
+        return card if card.end is None or day <= card.end else None
+
+    def on(self, day: date) -> dict[str, Card]:
+        """Every sign's card on `day`; memoised for the last few days."""
+        cards = self._days.get(day)
+        if cards is None:
+            cards = {}
+            for sign in self._cards:
+                card = self.lookup(sign, day)
+                if card is not None:
+                    cards[sign] = card
+            with self._lock:
+                if len(self._days) >= 4:
+                    self._days.pop(next(iter(self._days)))
+                self._days[day] = cards
+        return cards
+
+
+@dataclass(frozen=True)
+class ContentPack:
+    name: str
+    signs: tuple[Sign, ...]
+    captions: Mapping[str, str]
+    order: tuple[str, ...]
+    emoji: Mapping[str, str]
+    names: Mapping[str, str]
+    sources: Mapping[str, str]
+    schedule: ScheduleIndex = ScheduleIndex()
+    path: str = ""
+    mtime_ns: int = 0
+
+    def caption(self, key: str, **values: str) -> str:
+        return self.captions[key].format(**values)
+
+    def images_on(self, day: date) -> dict[str, str]:
+        """Sign -> scheduled image filename on `day` (signs without one omitted)."""
+        return {sign: card.image for sign, card in self.schedule.on(day).items() if card.image}
+
+    def sources_on(self, day: date) -> dict[str, str]:
+        """Source link of every sign on `day`: scheduled, else the pack default."""
+        scheduled = {sign: card.source for sign, card in self.schedule.on(day).items() if card.source}
+        return {**self.sources, **scheduled}
+
+# =============================
+# ----- Loading & Validation -----
+# =============================
+
+def _read(path: Path) -> dict:
+    if path.suffix == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compile_pack(data: dict, path: str = "", mtime_ns: int = 0) -> ContentPack:
+    """Validate raw pack data and freeze it; raises ContentError."""
+    if not isinstance(data, dict):
+        raise ContentError("a pack must be an object")
+    raw_signs = data.get("signs")
+    if not isinstance(raw_signs, list) or not raw_signs:
+        raise ContentError("'signs' must be a non-empty list")
+
+    signs = []
+    for i, raw in enumerate(raw_signs):
+        if not isinstance(raw, dict):
+            raise ContentError(f"signs[{i}] must be an object")
+        key = raw.get("key")
+        if not isinstance(key, str) or not KEY_PATTERN.match(key):
+            raise ContentError(f"signs[{i}]: 'key' must be a lowercase identifier, got {key!r}")
+        if any(s.key == key for s in signs):
+            raise ContentError(f"signs[{i}]: duplicate key {key!r}")
+        emoji = raw.get("emoji")
+        if not isinstance(emoji, str) or not emoji:
+            raise ContentError(f"{key}: 'emoji' is required")
+        name = raw.get("name", key.title())
+        source = raw.get("source")
+        if source is not None and not (isinstance(source, str) and source.startswith(("https://", "http://"))):
+            raise ContentError(f"{key}: 'source' must be an http(s) URL, got {source!r}")
+        signs.append(Sign(key, emoji, str(name), source))
+
+    captions = data.get("captions", {})
+    if not isinstance(captions, dict) or not all(isinstance(v, str) for v in captions.values()):
+        raise ContentError("'captions' must map names to strings")
+    unknown = set(captions) - set(CAPTIONS)
+    if unknown:
+        raise ContentError(f"unknown captions: {', '.join(sorted(unknown))}")
+
+    schedule = _compile_schedule(data.get("schedule", []), {s.key for s in signs})
+
+    return ContentPack(
+        name=str(data.get("name", Path(path).stem)),
+        signs=tuple(signs),
+        captions=MappingProxyType({**CAPTIONS, **captions}),
+        order=tuple(s.key for s in signs),
+        emoji=MappingProxyType({s.key: s.emoji for s in signs}),
+        names=MappingProxyType({s.key: s.name for s in signs}),
+        sources=MappingProxyType({s.key: s.source for s in signs if s.source}),
+        schedule=schedule,
+        path=path,
+        mtime_ns=mtime_ns,
+    )
+
+
+def _compile_schedule(raw_entries, keys: set[str]) -> ScheduleIndex:
+    if not isinstance(raw_entries, list):
+        raise ContentError("'schedule' must be a list")
+    cards = []
+    for i, raw in enumerate(raw_entries):
+        where = f"schedule[{i}]"
+        if not isinstance(raw, dict) or raw.get("sign") not in keys:
+            raise ContentError(f"{where}: 'sign' must be one of the pack's signs")
+        try:
+            start = date.fromisoformat(str(raw["from"]))
+            end = date.fromisoformat(str(raw["until"])) if raw.get("until") else None
+        except (KeyError, ValueError) as e:
+            raise ContentError(f"{where}: 'from'/'until' must be YYYY-MM-DD dates ({e})") from e
+        if end is not None and end < start:
+            raise ContentError(f"{where}: 'until' is before 'from'")
+        image, source = raw.get("image"), raw.get("source")
+        if image is None and source is None:
+            raise ContentError(f"{where}: needs an 'image' and/or a 'source'")
+        if image is not None and (not isinstance(image, str) or "/" in image or "\\" in image):
+            raise ContentError(f"{where}: 'image' must be a file name in the asset folder")
+        if source is not None and not (isinstance(source, str) and source.startswith(("https://", "http://"))):
+            raise ContentError(f"{where}: 'source' must be an http(s) URL, got {source!r}")
+        cards.append(Card(raw["sign"], start, end, image, source))
+    return ScheduleIndex(cards)
+
+
+def load_pack(path: str | os.PathLike) -> ContentPack:
+    path = Path(path)
+    mtime_ns = path.stat().st_mtime_ns
+    try:
+        data = _read(path)
+    except ValueError as e:  # JSONDecodeError and TOMLDecodeError
+        raise ContentError(f"{path}: {e}") from e
+    try:
+        return compile_pack(data, str(path), mtime_ns)
+    except ContentError as e:
+        raise ContentError(f"{path}: {e}") from e
+
+
+def pack_path(name: str, folder: str | os.PathLike = CONTENT_DIR) -> Path:
+    for suffix in PACK_SUFFIXES:
+        path = Path(folder) / f"{name}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"No content pack {name!r} in {folder}")
+
+# =============================
+# ----- Shared, hot-swappable pack -----
+# =============================
+
+class PackStore:
+    """Holds the live pack for one file and swaps it when the file changes."""
+
+    def __init__(self, path: str | os.PathLike, check_interval: float = CHECK_INTERVAL):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._pack = load_pack(self.path)
+        self._seen_mtime_ns = self._pack.mtime_ns
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def current(self) -> ContentPack:
+        """The live pack; at most one stat() per check interval."""
+        if time.monotonic() - self._checked >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked = time.monotonic()
+                mtime_ns = self.path.stat().st_mtime_ns
+                # A broken file is reported once, not on every check
+                if mtime_ns != self._seen_mtime_ns:
+                    self._seen_mtime_ns = mtime_ns
+                    self.reload()
+            except OSError as e:
+                logger.error("Keeping content pack %s: %s", self._pack.name, e)
+            finally:
+                self._lock.release()
+        return self._pack
+
+    def reload(self) -> ContentPack:
+        """Load and validate the file, then swap it in with one assignment."""
+        try:
+            pack = load_pack(self.path)
+        except ContentError as e:
+            logger.error("Keeping content pack %s: %s", self._pack.name, e)
+            return self._pack
+        logger.info("Content pack %s loaded from %s (%d signs)", pack.name, self.path, len(pack.signs))
+        self._pack = pack
+        return pack
+
+
+@st.cache_resource(show_spinner=False)
+def get_pack_store(name: str) -> PackStore:
+    return PackStore(pack_path(CONTENT_PACK or name))
+
+
+def content_pack(name: str) -> ContentPack:
+    """The live content pack for app `name`, shared by all sessions."""
+    return get_pack_store(name).current()
+
+# =============================
+# ----- CLI -----
+# =============================
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate content packs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="validate packs and print a summary")
+    check.add_argument("packs", nargs="+")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.packs:
+        try:
+            pack = load_pack(path)
+        except (ContentError, OSError) as e:
+            print(f"FAIL {e}")
+            failed += 1
+            continue
+        print(
+            f"ok   {path}: {pack.name}, {len(pack.signs)} signs, "
+            f"{len(pack.sources)} sources, {len(pack.schedule)} scheduled"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
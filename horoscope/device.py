@@ -0,0 +1,90 @@
+"""Per-session device negotiation from request headers and client hints.
+
+Reads the websocket handshake headers through `st.context.headers`:
+
+    Sec-CH-UA-Mobile / User-Agent    mobile or desktop layout
+    Sec-CH-Viewport-Width / Viewport-Width
+    Sec-CH-DPR / DPR                 device pixel ratio
+    Save-Data: on                    drop to 1x images
+
+Browsers only send the Sec-CH-* hints after the server asked for them, so put
+`Accept-CH: Sec-CH-UA-Mobile, Sec-CH-Viewport-Width, Sec-CH-DPR` on the page
+response in the reverse proxy. Without hints the User-Agent decides and the
+layout profile's own viewport/DPR assumptions are kept.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, replace
+from typing import Mapping
+
+import streamlit as st
+
+from horoscope.variants import MOBILE_BREAKPOINT, LayoutProfile
+
+MOBILE_UA = re.compile(r"Mobi|Android|iPhone|iPad|iPod|Opera Mini|IEMobile", re.IGNORECASE)
+
+# Keep retina images within reason even if a device reports DPR 4
+MAX_DPR = 3.0
+
+
+@dataclass(frozen=True)
+class ClientHints:
+    mobile: bool = False
+    viewport_width: int | None = None
+    dpr: float | None = None
+    save_data: bool = False
+
+
+def _number(value: str | None, cast):
+    try:
+        return cast(value.strip()) if value else None
+    except ValueError:
+        return None
+
+
+def read_client_hints(headers: Mapping[str, str]) -> ClientHints:
+    """Parse the device-related request headers (case-insensitively)."""
+    lower = {k.lower(): v for k, v in headers.items()}
+    viewport = _number(lower.get("sec-ch-viewport-width") or lower.get("viewport-width"), int)
+    dpr = _number(lower.get("sec-ch-dpr") or lower.get("dpr"), float)
+
+    ua_mobile = lower.get("sec-ch-ua-mobile")
+    if ua_mobile is not None:
+        mobile = ua_mobile.strip() == "?1"
+    else:
+        mobile = bool(MOBILE_UA.search(lower.get("user-agent", "")))
+    if viewport is not None:
+        mobile = mobile or viewport < MOBILE_BREAKPOINT
+
+    save_data = lower.get("save-data", "").strip().lower() == "on"
+    return ClientHints(mobile, viewport, dpr, save_data)
+
+
+def tune_layout(profile: LayoutProfile, hints: ClientHints) -> LayoutProfile:
+    """Return `profile` with the client's real viewport and DPR filled in."""
+    viewport = hints.viewport_width or profile.viewport_width
+    dpr = min(hints.dpr or profile.dpr, MAX_DPR)
+    if hints.save_data:
+        dpr = 1.0
+    return replace(profile, viewport_width=viewport, dpr=dpr)
+
+
+def request_headers() -> Mapping[str, str]:
+    context = getattr(st, "context", None)
+    return context.headers if context is not None else {}
+
+
+def session_hints() -> ClientHints:
+    """Client hints of the current session, parsed once per session."""
+    if "client_hints" not in st.session_state:
+        st.session_state["client_hints"] = read_client_hints(request_headers())
+    return st.session_state["client_hints"]
+
+
+def session_layout(profile: LayoutProfile) -> LayoutProfile:
+    """`profile` tuned for the current session's device, cached per session."""
+    cache = st.session_state.setdefault("tuned_layouts", {})
+    if profile.name not in cache:
+        cache[profile.name] = tune_layout(profile, session_hints())
+    return cache[profile.name]
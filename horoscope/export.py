@@ -0,0 +1,246 @@
+"""Export an app as a static site for nginx or a CDN.
+
+    python -m horoscope.export OUT_DIR [--app game|game2] [--day YYYY-MM-DD] [folder]
+
+writes `index.html` (landing), one `<sign>.html` per sign and `end.html`,
+plus every image, its size variants and the app's stylesheet as
+content-hashed files under `a/` (the same names the static asset server
+uses). Pages reuse the app's CSS, layout profile and content pack, with the
+cards scheduled for `--day` (default today), and take their headers, labels
+and selector markup from the app module (LANDING_HEADER, MAIN_HEADER,
+today_html, ...), so each app exports as itself. Re-export daily when the
+pack has a schedule.
+
+Serve `a/` with `Cache-Control: public, max-age=31536000, immutable` and
+the pages with a short max-age. Navigation is plain links, so no Python
+runs per visitor. The Streamlit apps keep working for interactive use.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import importlib
+import os
+from datetime import date
+from pathlib import Path
+from types import ModuleType
+
+from horoscope.content import ContentPack, load_pack, pack_path
+from horoscope.placeholders import PlaceholderStore
+from horoscope.registry import scan_folder
+from horoscope.render import index_image_sources, picture_html
+from horoscope.static import URL_PREFIX, AssetIndex, HASH_LENGTH, publish
+from horoscope.styles import minify_css, split_critical
+from horoscope.variants import LayoutProfile, build_all
+
+# Streamlit lays pages out itself; these few rules stand in for it
+EXPORT_CSS = """
+body { margin: 0; font-family: "Source Sans Pro", system-ui, sans-serif; color: #e7e9ef; }
+.export-page { max-width: 1100px; margin: 0 auto; padding: 2rem 1rem; }
+.export-cols { display: flex; gap: 1rem; align-items: center; }
+.export-cols > * { flex: 1; }
+.export-cols > .wide { flex: 2; }
+.export-grid { display: grid; grid-template-columns: repeat(3, 1fr); gap: .5rem; }
+@media (min-width: 768px) { .export-grid { grid-template-columns: repeat(6, 1fr); } }
+.stButton { margin: .5rem 0; }
+.stButton > button { width: 100%; white-space: pre-line; }
+figure { margin: 0; text-align: center; }
+figcaption { opacity: .7; font-size: .9rem; margin-top: .5rem; }
+"""
+
+
+def _button(label: str, href: str, extra: str = "") -> str:
+    return (
+        f'<form class="stButton" action="{html.escape(href)}" method="get"{extra}>'
+        f"<button>{html.escape(label)}</button></form>"
+    )
+
+
+def _centered(inner: str) -> str:
+    return f'<div class="export-cols"><div></div><div class="wide">{inner}</div><div></div></div>'
+
+
+class SiteBuilder:
+    """Renders the pages of one app against a published asset index."""
+
+    def __init__(
+        self,
+        app: ModuleType,
+        folder: Path,
+        index: AssetIndex,
+        pack: ContentPack,
+        layout: LayoutProfile,
+        day: date,
+        grid: bool,
+        head: str,
+    ):
+        self.app = app
+        self.folder = folder
+        self.index = index
+        self.pack = pack
+        self.layout = layout
+        self.grid = grid
+        self.head = head
+        self.placeholders = PlaceholderStore(folder)
+        self.sources = pack.sources_on(day)
+        assets = scan_folder(folder, pack.order)
+        self.images = dict(assets.zodiac)
+        for sign, name in pack.images_on(day).items():
+            scheduled = assets.get(name)
+            if scheduled:
+                self.images[sign] = scheduled
+
+    def picture(self, path: Path | None, slot: str, caption: str | None = None) -> str:
+        if path is None or self.index.get(path) is None:
+            return ""
+        placeholder = self.placeholders.get(path, path.stat().st_mtime_ns)
+        sources = index_image_sources(self.index, path, slot, self.layout, ".", placeholder)
+        figcaption = f"<figcaption>{html.escape(caption)}</figcaption>" if caption else ""
+        return (
+            f'<figure class="{slot}-container">'
+            f"{picture_html(sources, slot, path.stem.title())}{figcaption}</figure>"
+        )
+
+    def page(self, title: str, body: str) -> str:
+        return (
+            '<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+            '<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f"<title>{html.escape(title)}</title>{self.head}</head>"
+            f'<body><main data-testid="stAppViewContainer"><div class="export-page">{body}</div></main></body></html>\n'
+        )
+
+    def landing(self) -> str:
+        first = self.pack.order[0]
+        body = (
+            self.app.LANDING_HEADER
+            + _centered(_button(self.app.ENTER_LABEL, f"{first}.html"))
+            + self.picture(self.folder / "intro.jpeg", "landing-image", self.pack.caption("landing"))
+        )
+        return self.page("Sustainable Public Procurement Horoscope", body)
+
+    def sign(self, sign: str) -> str:
+        app, pack, order = self.app, self.pack, self.pack.order
+        i = order.index(sign)
+        prev_sign, next_sign = order[(i - 1) % len(order)], order[(i + 1) % len(order)]
+
+        # The date is filled in by the browser, so the page stays cacheable
+        today = app.today_html("<span id='today'></span>")
+        if self.grid:
+            # game2's mobile layout stacks the date under the header
+            header = app.MAIN_HEADER + today
+        else:
+            header = f"<div class='export-cols'><div class='wide'>{app.MAIN_HEADER}</div>{today}</div>"
+        header += (
+            "<script>document.getElementById('today').textContent = new Date()"
+            ".toLocaleDateString('en-US', {month: 'short', day: '2-digit', year: 'numeric'});</script>"
+        )
+        selector = f"<h3>{html.escape(app.SELECTOR_TITLE)}</h3>"
+        if self.grid:
+            selector += '<div class="export-grid">' + "".join(
+                _button(f"{pack.emoji[s]}\n{pack.names[s]}", f"{s}.html") for s in order
+            ) + "</div>"
+        selector += (
+            '<div class="export-cols">'
+            + _button("◀", f"{prev_sign}.html")
+            + f'<div class="wide">{app.current_sign_html(pack.emoji[sign], html.escape(pack.names[sign]))}</div>'
+            + _button("▶", f"{next_sign}.html")
+            + "</div>"
+        )
+
+        path = self.images.get(sign)
+        if path is not None:
+            card = (
+                self.picture(path, "horoscope-image")
+                + "<hr>"
+                + '<div style="text-align: center; opacity: 0.8; font-style: italic;">'
+                + html.escape(pack.caption("spoken", name=pack.names[sign]))
+                + "</div>"
+            )
+        else:
+            card = f"<h3>🖼️ Your horoscope will appear here</h3><p class='small'>{html.escape(pack.caption('missing'))}</p>"
+        source = self.sources.get(sign)
+        if source:
+            card += (
+                '<div class="source-link">'
+                f'<div style="font-size: 0.9rem; opacity: 0.8; margin-bottom: 0.5rem;">{html.escape(pack.caption("source_label"))}</div>'
+                f'<a href="{html.escape(source)}" target="_blank" rel="noopener">{html.escape(source)}</a></div>'
+            )
+
+        body = (
+            header
+            + _centered(_button(app.LEARN_MORE_LABEL, "end.html"))
+            + selector
+            + f"<div class='content-panel'>{card}</div>"
+        )
+        return self.page(f"{pack.names[sign]} · Sustainable Public Procurement Horoscope", body)
+
+    def end(self) -> str:
+        # Back to the sign the visitor came from when there is one
+        back = ' onsubmit="if (history.length > 1) { history.back(); return false; }"'
+        body = (
+            self.app.END_HEADER
+            + self.picture(self.folder / "end.jpeg", "end-image", self.pack.caption("end"))
+            + _centered(_button(self.app.RETURN_LABEL, f"{self.pack.order[0]}.html", back))
+        )
+        return self.page("Sustainable Public Procurement Message", body)
+
+
+def _write_stylesheet(css: str, out_dir: Path) -> str:
+    """Publish the non-critical rules as a hashed file; return the <head> markup."""
+    critical, deferred = split_critical(minify_css(css) + minify_css(EXPORT_CSS))
+    data = deferred.encode()
+    name = f"styles.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.css"
+    target = out_dir / URL_PREFIX.strip("/") / name
+    target.write_bytes(data)
+    return f'<style>{critical}</style><link rel="stylesheet" href=".{URL_PREFIX}{name}">'
+
+
+def export_site(
+    app: str,
+    out_dir: str | os.PathLike,
+    folder: str | os.PathLike = ".",
+    day: date | None = None,
+) -> list[Path]:
+    """Write the static site of `app`; returns the pages written."""
+    folder, out_dir = Path(folder), Path(out_dir)
+    module = importlib.import_module(app)
+    css = getattr(module, "STARFIELD_CSS", None) or getattr(module, "MOBILE_FRIENDLY_CSS")
+    pack = load_pack(pack_path(getattr(module, "CONTENT_PACK", app)))
+
+    build_all(folder)
+    index = publish(folder, out_dir)
+    head = _write_stylesheet(css, out_dir)
+
+    builder = SiteBuilder(
+        module, folder, index, pack, module.LAYOUT, day or date.today(),
+        grid=hasattr(module, "create_zodiac_selector"), head=head,
+    )
+    pages = {"index.html": builder.landing(), "end.html": builder.end()}
+    for sign in pack.order:
+        pages[f"{sign}.html"] = builder.sign(sign)
+
+    written = []
+    for name, markup in pages.items():
+        path = out_dir / name
+        path.write_text(markup, encoding="utf-8")
+        written.append(path)
+    return written
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export an app as a static site.")
+    parser.add_argument("out_dir")
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--app", default="game", choices=("game", "game2"))
+    parser.add_argument("--day", type=date.fromisoformat, default=None)
+    args = parser.parse_args(argv)
+
+    pages = export_site(args.app, args.out_dir, args.folder, args.day)
+    assets = len(list((Path(args.out_dir) / URL_PREFIX.strip("/")).iterdir()))
+    print(f"exported {args.app}: {len(pages)} page(s), {assets} hashed asset(s) in {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,304 @@
+"""Run N app workers behind a sticky, websocket-aware reverse proxy.
+
+One Streamlit process runs every session's script on threads under a single
+GIL. This launcher starts `--workers` copies of the app on local ports and
+puts a small asyncio proxy in front of them:
+
+- sticky sessions: the first response sets a `horoscope_worker` cookie, so
+  the page, its websocket and its `/media` files stay on one process
+- websocket upgrades are passed through as raw byte streams
+- health checks poll `/_stcore/health`; unhealthy workers get no new
+  sessions and a worker that exits is started again
+- graceful drain: SIGTERM/SIGINT stop accepting connections, wait up to
+  `--drain-timeout` for open websockets to close, then stop the workers;
+  SIGHUP drains and restarts the workers one at a time
+
+Everything binds to localhost by default, so it runs on one box with no
+external infrastructure::
+
+    python -m horoscope.launcher app.py --workers 4 --port 8501
+
+Per-process ports are offset by the worker number so workers do not
+collide: the static asset server always (HOROSCOPE_ASSET_PORT, default
+8600), the metrics endpoint when HOROSCOPE_METRICS_PORT turns it on.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+from horoscope.metrics import METRICS_PORT
+from horoscope.static import ASSET_PORT
+
+logger = logging.getLogger("horoscope.launcher")
+
+COOKIE = "horoscope_worker"
+HEALTH_PATH = "/_stcore/health"
+HEAD_LIMIT = 64 * 1024
+
+
+@dataclass
+class Worker:
+    index: int
+    port: int
+    process: subprocess.Popen | None = None
+    healthy: bool = False
+    draining: bool = False
+    failures: int = 0
+    sockets: int = 0  # open websocket connections
+    requests: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and not self.draining
+
+
+class Launcher:
+    def __init__(
+        self,
+        app: str,
+        workers: int,
+        host: str = "127.0.0.1",
+        port: int = 8501,
+        base_port: int = 8511,
+        health_interval: float = 2.0,
+        drain_timeout: float = 30.0,
+        streamlit_args: list[str] | None = None,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.health_interval = health_interval
+        self.drain_timeout = drain_timeout
+        self.streamlit_args = streamlit_args or []
+        self.workers = [Worker(i, base_port + i) for i in range(workers)]
+        self.stopping = False
+        self._turn = itertools.count()
+        self._server: asyncio.base_events.Server | None = None
+
+    # ----- Workers -----
+
+    def spawn(self, worker: Worker):
+        env = dict(
+            os.environ,
+            HOROSCOPE_WORKER=str(worker.index),
+            HOROSCOPE_ASSET_PORT=str(ASSET_PORT + worker.index),
+        )
+        if METRICS_PORT:  # 0 means off
+            env["HOROSCOPE_METRICS_PORT"] = str(METRICS_PORT + worker.index)
+        cmd = [
+            sys.executable, "-m", "streamlit", "run", self.app,
+            "--server.port", str(worker.port),
+            "--server.address", "127.0.0.1",
+            "--server.headless", "true",
+            *self.streamlit_args,
+        ]
+        worker.process = subprocess.Popen(cmd, env=env)
+        worker.healthy = worker.draining = False
+        worker.failures = 0
+        worker.started = time.monotonic()
+        logger.info("Worker %d started on port %d (pid %d)", worker.index, worker.port, worker.process.pid)
+
+    async def stop(self, worker: Worker):
+        process = worker.process
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        for _ in range(100):
+            if process.poll() is not None:
+                return
+            await asyncio.sleep(0.1)
+        process.kill()
+
+    async def drain(self, worker: Worker):
+        """Stop routing new sessions to `worker`, wait for its websockets, stop it."""
+        worker.draining = True
+        deadline = time.monotonic() + self.drain_timeout
+        while worker.sockets and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+        if worker.sockets:
+            logger.warning("Worker %d still has %d session(s) after draining", worker.index, worker.sockets)
+        await self.stop(worker)
+        logger.info("Worker %d drained", worker.index)
+
+    async def rolling_restart(self):
+        for worker in self.workers:
+            await self.drain(worker)
+            self.spawn(worker)
+            while not self.stopping and not worker.healthy:
+                await asyncio.sleep(0.2)
+
+    async def check(self, worker: Worker) -> bool:
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", worker.port), 2)
+            writer.write(f"GET {HEALTH_PATH} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode())
+            status = await asyncio.wait_for(reader.readline(), 2)
+            writer.close()
+            return status.split(b" ")[1:2] == [b"200"]
+        except (OSError, asyncio.TimeoutError, IndexError):
+            return False
+
+    async def health_loop(self):
+        while not self.stopping:
+            for worker in self.workers:
+                if worker.process is not None and worker.process.poll() is not None and not worker.draining:
+                    logger.error("Worker %d exited with %s; restarting", worker.index, worker.process.returncode)
+                    self.spawn(worker)
+                    continue
+                ok = await self.check(worker)
+                worker.failures = 0 if ok else worker.failures + 1
+                if ok != worker.healthy and (ok or worker.failures >= 2):
+                    worker.healthy = ok
+                    logger.info("Worker %d is %s", worker.index, "healthy" if ok else "unhealthy")
+            await asyncio.sleep(self.health_interval)
+
+    # ----- Proxy -----
+
+    def pick(self, cookie: str | None) -> tuple[Worker | None, bool]:
+        """Return the worker for a request and whether to (re)set the cookie."""
+        if cookie is not None and cookie.isdigit() and int(cookie) < len(self.workers):
+            worker = self.workers[int(cookie)]
+            if worker.available:
+                return worker, False
+        candidates = [w for w in self.workers if w.available]
+        if not candidates:
+            return None, False
+        turn = next(self._turn)
+        # Fewest open sessions first; round-robin among equals
+        worker = min(candidates, key=lambda w: (w.sockets, (w.index - turn) % len(self.workers)))
+        return worker, True
+
+    async def handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        try:
+            head = await client_reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+
+        lines = head.decode("latin-1").split("\r\n")[:-2]
+        headers = [line.split(":", 1) for line in lines[1:] if ":" in line]
+        values = {name.strip().lower(): value.strip() for name, value in headers}
+        upgrade = values.get("upgrade", "").lower() == "websocket"
+        cookies = dict(
+            c.strip().split("=", 1) for c in values.get("cookie", "").split(";") if "=" in c
+        )
+        worker, set_cookie = self.pick(cookies.get(COOKIE))
+        if worker is None:
+            client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nRetry-After: 2\r\nConnection: close\r\n\r\n")
+            await client_writer.drain()
+            client_writer.close()
+            return
+
+        # One request per plain HTTP connection, so every request is routed;
+        # websockets keep theirs open
+        kept = [f"{n}:{v}" for n, v in headers if n.strip().lower() not in ("connection", "x-forwarded-for")]
+        peer = client_writer.get_extra_info("peername") or ("", 0)
+        kept += [
+            f"Connection: {'Upgrade' if upgrade else 'close'}",
+            f"X-Forwarded-For: {peer[0]}",
+        ]
+        try:
+            backend_reader, backend_writer = await asyncio.open_connection("127.0.0.1", worker.port)
+        except OSError:
+            worker.healthy = False
+            client_writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await client_writer.drain()
+            client_writer.close()
+            return
+        backend_writer.write(("\r\n".join([lines[0], *kept]) + "\r\n\r\n").encode("latin-1"))
+
+        worker.requests += 1
+        if upgrade:
+            worker.sockets += 1
+        try:
+            upstream = asyncio.ensure_future(_pipe(client_reader, backend_writer))
+            downstream = asyncio.ensure_future(
+                self._respond(backend_reader, client_writer, worker if set_cookie else None)
+            )
+            done, _ = await asyncio.wait({upstream, downstream}, return_when=asyncio.FIRST_COMPLETED)
+            if downstream not in done:
+                # Client went away: give the backend a moment to finish, then cut
+                await asyncio.wait({downstream}, timeout=0 if upgrade else 5)
+            for task in (upstream, downstream):
+                task.cancel()
+        finally:
+            if upgrade:
+                worker.sockets -= 1
+            for writer in (backend_writer, client_writer):
+                writer.close()
+
+    async def _respond(self, backend_reader, client_writer, cookie_worker: Worker | None):
+        head = await backend_reader.readuntil(b"\r\n\r\n")
+        if cookie_worker is not None:
+            cookie = f"Set-Cookie: {COOKIE}={cookie_worker.index}; Path=/; HttpOnly; SameSite=Lax\r\n"
+            head = head[:-2] + cookie.encode() + b"\r\n"
+        client_writer.write(head)
+        await _pipe(backend_reader, client_writer)
+
+    # ----- Lifecycle -----
+
+    async def run(self):
+        for worker in self.workers:
+            self.spawn(worker)
+        health = asyncio.ensure_future(self.health_loop())
+        self._server = await asyncio.start_server(self.handle, self.host, self.port, limit=HEAD_LIMIT)
+        logger.info("Proxy on http://%s:%d -> %d worker(s)", self.host, self.port, len(self.workers))
+
+        loop = asyncio.get_running_loop()
+        done = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, done.set)
+        if hasattr(signal, "SIGHUP"):
+            loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.rolling_restart()))
+        await done.wait()
+
+        logger.info("Draining %d worker(s)", len(self.workers))
+        self._server.close()
+        await asyncio.gather(*(self.drain(w) for w in self.workers))
+        self.stopping = True
+        health.cancel()
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run app workers behind a sticky websocket proxy.")
+    parser.add_argument("app", nargs="?", default="app.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--base-port", type=int, default=8511, help="first worker port")
+    parser.add_argument("--health-interval", type=float, default=2.0)
+    parser.add_argument("--drain-timeout", type=float, default=30.0)
+    args, streamlit_args = parser.parse_known_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    launcher = Launcher(
+        args.app, args.workers, args.host, args.port, args.base_port,
+        args.health_interval, args.drain_timeout, streamlit_args,
+    )
+    asyncio.run(launcher.run())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+"""Build-time asset manifest, so the apps start without scanning the folder.
+
+    python -m horoscope.manifest [folder] [--format json|msgpack]
+
+writes `assets.manifest.json` (or `.msgpack`, if msgpack is installed) with,
+for every image: its sign key, SHA-256, pixel size, byte size, mtime, the
+built variants, a low-quality placeholder and the matching source link from
+each app's content pack.
+
+At startup the registry and the static asset index take their data from the
+manifest after a cheap freshness check: one directory read, whose image file
+names must hash to the recorded digest, plus one stat per listed file,
+compared against the recorded mtimes and sizes. Any mismatch falls back to a
+normal scan. Other files in the folder (the app's code, checkouts, build
+output) do not affect the check.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from horoscope.variants import IMAGE_EXTENSIONS, VARIANT_DIR, iter_images
+
+MANIFEST_VERSION = 2
+MANIFEST_NAMES = ("assets.manifest.msgpack", "assets.manifest.json")
+APPS = ("game", "game2")
+
+
+def _file_entry(path: Path) -> dict:
+    from PIL import Image
+
+    from horoscope.static import file_digest
+
+    stat = path.stat()
+    with Image.open(path) as im:
+        width, height = im.size
+    return {
+        "sha256": file_digest(path),
+        "width": width,
+        "height": height,
+        "bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def build_manifest(folder: str | os.PathLike, apps: tuple[str, ...] = APPS) -> dict:
+    """Describe every asset in `folder` (and its variants)."""
+    folder_path = Path(folder)
+    from horoscope.content import load_pack, pack_path
+
+    packs = {app: load_pack(pack_path(app)) for app in apps}
+    order = next(iter(packs.values())).order if packs else ()
+
+    variants_by_stem: dict[str, list[Path]] = {}
+    for variant in iter_images(folder_path / VARIANT_DIR):
+        variants_by_stem.setdefault(variant.stem.rsplit("-", 1)[0], []).append(variant)
+
+    from horoscope.placeholders import compute_placeholder
+
+    assets = {}
+    for path in iter_images(folder_path):
+        sign = path.stem.lower().strip()
+        entry = _file_entry(path)
+        entry["sign"] = sign if sign in order else None
+        entry["sources"] = {
+            app: pack.sources[sign]
+            for app, pack in packs.items()
+            if sign in pack.sources
+        }
+        entry["placeholder"] = compute_placeholder(path)
+        entry["variants"] = {
+            variant.name: _file_entry(variant)
+            for variant in sorted(variants_by_stem.get(path.stem, []))
+        }
+        assets[path.name] = entry
+
+    return {
+        "version": MANIFEST_VERSION,
+        "images_digest": image_names_digest(folder_path),
+        "variants_digest": image_names_digest(folder_path / VARIANT_DIR),
+        "assets": assets,
+    }
+
+
+def image_names_digest(folder: str | os.PathLike) -> str:
+    """Hash of the image file names directly in `folder`, from one directory read."""
+    try:
+        with os.scandir(folder) as entries:
+            names = sorted(
+                e.name for e in entries
+                if e.is_file() and os.path.splitext(e.name)[1].lower() in IMAGE_EXTENSIONS
+            )
+    except FileNotFoundError:
+        names = []
+    return hashlib.sha256("\n".join(names).encode()).hexdigest()
+
+
+def _encode(manifest: dict, fmt: str) -> bytes:
+    if fmt == "msgpack":
+        import msgpack
+
+        return msgpack.packb(manifest)
+    return json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8")
+
+
+def write_manifest(folder: str | os.PathLike, manifest: dict, fmt: str = "json") -> Path:
+    """Write `manifest` into `folder` atomically."""
+    target = Path(folder) / (MANIFEST_NAMES[0] if fmt == "msgpack" else MANIFEST_NAMES[1])
+    tmp = target.with_name(f".{target.name}.tmp")
+    tmp.write_bytes(_encode(manifest, fmt))
+    os.replace(tmp, target)
+    return target
+
+
+def load_manifest(folder: str | os.PathLike) -> dict | None:
+    """Return the manifest in `folder`, or None if there is none."""
+    for name in MANIFEST_NAMES:
+        path = Path(folder) / name
+        if not path.exists():
+            continue
+        if name.endswith(".msgpack"):
+            try:
+                import msgpack
+            except ImportError:
+                continue
+            manifest = msgpack.unpackb(path.read_bytes())
+        else:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    return None
+
+
+def manifest_is_fresh(folder: str | os.PathLike, manifest: dict, variants: bool = False) -> bool:
+    """Cheaply check that the files on disk are the ones the manifest lists."""
+    folder_path = Path(folder)
+    if image_names_digest(folder_path) != manifest["images_digest"]:
+        return False
+    if variants and image_names_digest(folder_path / VARIANT_DIR) != manifest["variants_digest"]:
+        return False
+    for name, entry in manifest["assets"].items():
+        files = [(folder_path / name, entry)]
+        if variants:
+            files += [(folder_path / VARIANT_DIR / v, e) for v, e in entry["variants"].items()]
+        for path, recorded in files:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return False
+            if stat.st_mtime_ns != recorded["mtime_ns"] or stat.st_size != recorded["bytes"]:
+                return False
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Write the asset manifest.")
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--format", choices=("json", "msgpack"), default="json")
+    args = parser.parse_args(argv)
+
+    manifest = build_manifest(args.folder)
+    target = write_manifest(args.folder, manifest, args.format)
+    print(f"wrote {target} ({len(manifest['assets'])} asset(s))")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+"""Process-wide, de-duplicated media for HOROSCOPE_ASSET_MODE=shared.
+
+`st.image` registers the shown bytes with Streamlit's media file manager
+for the session at that element's position. Streamlit drops the file as soon
+as no session references it, so every view re-hashes, re-stores and
+re-encodes the same few images.
+
+In shared mode each distinct image variant is pinned in the media file
+manager once per process, under a pseudo-session of its own, and pages
+point a plain `<img>` at its stable `/media/...` URL. Sessions only hold
+references (session id and slot), so per-session memory stays flat however
+many signs a visitor browses. References of ended sessions are dropped at
+most every PRUNE_INTERVAL seconds, on the next acquire. Once the pinned bytes exceed
+HOROSCOPE_SHARED_MEDIA_MB (default 128), the least recently used entries
+that no live session references are unpinned.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import streamlit as st
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.media_file_manager import MediaFileMetadata
+from streamlit.runtime.media_file_storage import MediaFileKind
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from horoscope.assetpack import packed_bytes
+from horoscope.static import ASSET_MODE
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+SHARED_MEDIA_MB = float(os.environ.get("HOROSCOPE_SHARED_MEDIA_MB", "128"))
+PRUNE_INTERVAL = 5.0  # seconds between sweeps for ended sessions
+
+# Pseudo-session that owns the pinned files in the media file manager
+PIN_SESSION = "horoscope-shared-media"
+
+
+def shared_mode() -> bool:
+    return ASSET_MODE == "shared"
+
+
+@dataclass
+class SharedEntry:
+    file_id: str
+    url: str
+    size: int
+    refs: set[tuple[str, str]] = field(default_factory=set)
+
+
+class SharedMediaStore:
+    """Pins image bytes in Streamlit's media file manager, once per content."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.pins = 0
+        self.unpins = 0
+        self._bytes = 0
+        self._manager = None
+        self._ids: dict[tuple[str, int], str] = {}
+        self._entries: OrderedDict[str, SharedEntry] = OrderedDict()
+        self._held: dict[tuple[str, str], str] = {}
+        self._pruned = 0.0
+        self._lock = threading.Lock()
+
+    def _media_manager(self):
+        manager = Runtime.instance().media_file_mgr
+        if manager is not self._manager:
+            # A new runtime starts with an empty media store
+            self._manager = manager
+            self._ids.clear()
+            self._entries.clear()
+            self._held.clear()
+            self._bytes = 0
+            self._pruned = 0.0
+        return manager
+
+    def _pin(self, manager, source: Path) -> SharedEntry:
+        view = packed_bytes(source, source.stat().st_mtime_ns)
+        data = bytes(view) if view is not None else source.read_bytes()
+        mimetype = mimetypes.guess_type(source.name)[0] or "application/octet-stream"
+        # The media file manager has no public API for session-less files;
+        # register under our own pseudo-session so it never sees them orphaned
+        with manager._lock:
+            file_id = manager._storage.load_and_get_id(data, mimetype, MediaFileKind.MEDIA, None)
+            manager._file_metadata.setdefault(file_id, MediaFileMetadata(kind=MediaFileKind.MEDIA))
+            manager._files_by_session_and_coord[PIN_SESSION][file_id] = file_id
+            url = manager._storage.get_url(file_id)
+        self.pins += 1
+        return SharedEntry(file_id, url, len(data))
+
+    def _unpin(self, manager, entry: SharedEntry):
+        with manager._lock:
+            manager._files_by_session_and_coord[PIN_SESSION].pop(entry.file_id, None)
+        self.unpins += 1
+
+    def acquire(self, source: Path, mtime_ns: int, session_id: str, slot: str) -> str:
+        """Return the shared URL of `source` and record that `session_id`
+        shows it in `slot`, releasing whatever that slot showed before.
+        """
+        manager = self._media_manager()
+        holder = (session_id, slot)
+        with self._lock:
+            file_id = self._ids.get((str(source), mtime_ns))
+            entry = self._entries.get(file_id) if file_id else None
+            if entry is None:
+                entry = self._pin(manager, source)
+                self._ids[(str(source), mtime_ns)] = entry.file_id
+                if entry.file_id in self._entries:
+                    # Same bytes under another name: one copy
+                    entry = self._entries[entry.file_id]
+                else:
+                    self._entries[entry.file_id] = entry
+                    self._bytes += entry.size
+            previous = self._held.get(holder)
+            if previous != entry.file_id:
+                if previous in self._entries:
+                    self._entries[previous].refs.discard(holder)
+                self._held[holder] = entry.file_id
+            entry.refs.add(holder)
+            self._entries.move_to_end(entry.file_id)
+            self._prune()
+            evicted = self._evict(manager) if self._bytes > self.max_bytes else 0
+        if evicted:
+            manager.remove_orphaned_files()
+        return entry.url
+
+    def _prune(self, force: bool = False):
+        """Drop the references of sessions that have ended."""
+        now = time.monotonic()
+        if not force and now - self._pruned < PRUNE_INTERVAL:
+            return
+        self._pruned = now
+        runtime = Runtime.instance()
+        for holder in [h for h in self._held if not runtime.is_active_session(h[0])]:
+            file_id = self._held.pop(holder)
+            if file_id in self._entries:
+                self._entries[file_id].refs.discard(holder)
+
+    def _evict(self, manager) -> int:
+        """Unpin least recently used, unreferenced entries down to the budget."""
+        self._prune(force=True)
+        evicted = 0
+        for file_id in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            entry = self._entries[file_id]
+            if entry.refs:
+                continue
+            del self._entries[file_id]
+            self._ids = {k: v for k, v in self._ids.items() if v != file_id}
+            self._bytes -= entry.size
+            self._unpin(manager, entry)
+            evicted += 1
+        return evicted
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "references": sum(len(e.refs) for e in self._entries.values()),
+                "pins": self.pins,
+                "unpins": self.unpins,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_media() -> SharedMediaStore:
+    return SharedMediaStore(int(SHARED_MEDIA_MB * 1024 * 1024))
+
+
+def shared_url(source: Path, mtime_ns: int, slot: str) -> str:
+    """URL of `source` in the shared store, held by this session's `slot`."""
+    ctx = get_script_run_ctx()
+    url = get_shared_media().acquire(source, mtime_ns, ctx.session_id if ctx else "", slot)
+    base = config.get_option("server.baseUrlPath").strip("/")
+    return f"/{base}{url}" if base else url
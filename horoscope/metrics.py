@@ -0,0 +1,294 @@
+"""Per-run phase timings and counters in Prometheus text format.
+
+Phases of a script run (stylesheet, asset lookup, page renderers, image
+display, selectors) are timed with `timed(...)` into per-process histograms.
+Script runs, router events, active sessions and image cache counters are
+exported next to them.
+
+Settings:
+    HOROSCOPE_METRICS_PORT    serve /metrics on this port (default: off)
+    HOROSCOPE_METRICS_BIND    interface for the endpoint (default 127.0.0.1)
+    HOROSCOPE_METRICS_FILE    also write the exposition to this file, e.g. for
+                              node_exporter's textfile collector (default: off)
+    HOROSCOPE_METRICS_FLUSH   seconds between file writes (default 15)
+"""
+from __future__ import annotations
+
+import bisect
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from horoscope.cache import get_image_cache
+from horoscope.media import get_shared_media, shared_mode
+from horoscope.variant_service import get_variant_service, lazy_variants
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+METRICS_PORT = int(os.environ.get("HOROSCOPE_METRICS_PORT", "0"))
+METRICS_BIND = os.environ.get("HOROSCOPE_METRICS_BIND", "127.0.0.1")
+METRICS_FILE = os.environ.get("HOROSCOPE_METRICS_FILE", "")
+METRICS_FLUSH = float(os.environ.get("HOROSCOPE_METRICS_FLUSH", "15"))
+
+# Seconds; script phases range from sub-millisecond to multi-second image loads
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# A session counts as active if it ran the script within this many seconds
+SESSION_WINDOW = 300.0
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: Labels) -> Iterator[str]:
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            le = f'le="{bound}"'
+            yield f"{name}_bucket{_labels(labels, le)} {running}"
+        running += self.counts[-1]
+        le = 'le="+Inf"'
+        yield f"{name}_bucket{_labels(labels, le)} {running}"
+        yield f"{name}_sum{_labels(labels)} {self.sum:.6f}"
+        yield f"{name}_count{_labels(labels)} {running}"
+
+
+class Metrics:
+    """Thread-safe store of histograms, counters and collector callbacks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._help: dict[str, tuple[str, str]] = {}
+        self._sessions: dict[str, float] = {}
+        self._pruned = 0.0
+        self._collectors: list[Callable[[], Iterator[str]]] = []
+        self._local = threading.local()
+
+    def describe(self, name: str, kind: str, text: str):
+        self._help[name] = (kind, text)
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def add_collector(self, collector: Callable[[], Iterator[str]]):
+        """Register a callback yielding exposition lines at scrape time."""
+        self._collectors.append(collector)
+
+    # ----- Script runs -----
+
+    @property
+    def app(self) -> str:
+        """App label of the script run on this thread."""
+        return getattr(self._local, "app", "")
+
+    def begin_run(self, app: str, session_id: str | None = None):
+        """Count a script run of `app`; call once at the top of every run."""
+        self._local.app = app
+        self.inc("horoscope_script_runs_total", app=app)
+        if session_id:
+            now = time.monotonic()
+            with self._lock:
+                self._sessions[session_id] = now
+                # Without an exporter nothing else prunes the table
+                if now - self._pruned >= SESSION_WINDOW:
+                    self._prune_sessions(now)
+
+    def _prune_sessions(self, now: float):
+        """Forget sessions idle for SESSION_WINDOW; call with the lock held."""
+        cutoff = now - SESSION_WINDOW
+        for session_id in [s for s, seen in self._sessions.items() if seen < cutoff]:
+            del self._sessions[session_id]
+        self._pruned = now
+
+    def active_sessions(self) -> int:
+        with self._lock:
+            self._prune_sessions(time.monotonic())
+            return len(self._sessions)
+
+    # ----- Exposition -----
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name: str, default_kind: str):
+            kind, text = self._help.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                header(name, "histogram")
+                for labels, histogram in sorted(series.items()):
+                    lines.extend(histogram.lines(name, labels))
+            for name, series in sorted(self._counters.items()):
+                header(name, "counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+
+        header("horoscope_active_sessions", "gauge")
+        lines.append(f"horoscope_active_sessions {self.active_sessions()}")
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | os.PathLike):
+        """Write the exposition atomically, so a collector never reads half a file."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def _image_cache_lines() -> Iterator[str]:
+    stats = get_image_cache().stats()
+    for key in ("hits", "misses", "evictions"):
+        yield f"# TYPE horoscope_image_cache_{key}_total counter"
+        yield f"horoscope_image_cache_{key}_total {stats[key]}"
+    for key in ("entries", "bytes", "max_bytes"):
+        yield f"# TYPE horoscope_image_cache_{key} gauge"
+        yield f"horoscope_image_cache_{key} {stats[key]}"
+
+
+def _shared_media_lines() -> Iterator[str]:
+    stats = get_shared_media().stats()
+    for key in ("pins", "unpins"):
+        yield f"# TYPE horoscope_shared_media_{key}_total counter"
+        yield f"horoscope_shared_media_{key}_total {stats[key]}"
+    for key in ("entries", "bytes", "max_bytes", "references"):
+        yield f"# TYPE horoscope_shared_media_{key} gauge"
+        yield f"horoscope_shared_media_{key} {stats[key]}"
+
+
+def _variant_service_lines() -> Iterator[str]:
+    stats = get_variant_service().stats()
+    for key in ("jobs", "joined", "disk_hits", "failures"):
+        yield f"# TYPE horoscope_variant_{key}_total counter"
+        yield f"horoscope_variant_{key}_total {stats[key]}"
+    yield "# TYPE horoscope_variant_inflight gauge"
+    yield f"horoscope_variant_inflight {stats['inflight']}"
+
+# =============================
+# ----- Exporters -----
+# =============================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, metrics: Metrics, address: tuple[str, int]):
+        super().__init__(address, _MetricsHandler)
+        self.metrics = metrics
+
+    def start(self) -> "MetricsServer":
+        threading.Thread(target=self.serve_forever, name="horoscope-metrics", daemon=True).start()
+        return self
+
+
+def _flush_forever(metrics: Metrics, path: str, interval: float):
+    while True:
+        try:
+            metrics.write(path)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics() -> Metrics:
+    """Create the process-wide metrics and start the configured exporters."""
+    metrics = Metrics()
+    metrics.describe("horoscope_phase_seconds", "histogram", "Wall time of one phase of a script run.")
+    metrics.describe("horoscope_script_runs_total", "counter", "Script runs, per app.")
+    metrics.describe("horoscope_router_events_total", "counter", "Navigation events, per page and event.")
+    metrics.describe("horoscope_active_sessions", "gauge", f"Sessions that ran the script in the last {SESSION_WINDOW:g}s.")
+    metrics.add_collector(_image_cache_lines)
+    if shared_mode():
+        metrics.add_collector(_shared_media_lines)
+    if lazy_variants():
+        metrics.add_collector(_variant_service_lines)
+    if METRICS_PORT:
+        MetricsServer(metrics, (METRICS_BIND, METRICS_PORT)).start()
+    if METRICS_FILE:
+        threading.Thread(
+            target=_flush_forever,
+            args=(metrics, METRICS_FILE, METRICS_FLUSH),
+            name="horoscope-metrics-file",
+            daemon=True,
+        ).start()
+    return metrics
+
+
+def record_run(app: str):
+    """Count this script run of `app` and mark its session as active."""
+    ctx = get_script_run_ctx()
+    get_metrics().begin_run(app, ctx.session_id if ctx else None)
+
+
+@contextlib.contextmanager
+def timed(phase: str):
+    """Time a block (or, as a decorator, a function) into horoscope_phase_seconds."""
+    metrics = get_metrics()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe("horoscope_phase_seconds", time.perf_counter() - start, app=metrics.app, phase=phase)
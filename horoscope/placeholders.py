@@ -0,0 +1,89 @@
+"""Low-quality image placeholders (LQIP) drawn while the full card loads.
+
+Each asset gets a tiny base64 WebP thumbnail and its dominant colour. The
+static `<img>` shows them as its background until the real image paints over
+it, so a slow link sees a blurred card immediately instead of an empty box.
+
+Placeholders are precomputed into the asset manifest; assets missing from it
+are computed once per process on first use.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import threading
+from pathlib import Path
+
+import streamlit as st
+
+from horoscope.manifest import load_manifest
+
+THUMB_WIDTH = 16
+# Colours are bucketed to 4 bits per channel before picking the most common
+QUANT_BITS = 4
+
+
+def dominant_color(pixels) -> str:
+    """Return the most common (quantised) colour of an RGB array as #rrggbb."""
+    import numpy as np
+
+    rgb = np.asarray(pixels, dtype=np.uint8).reshape(-1, 3)
+    shift = 8 - QUANT_BITS
+    q = (rgb >> shift).astype(np.int32)
+    codes = (q[:, 0] << (2 * QUANT_BITS)) | (q[:, 1] << QUANT_BITS) | q[:, 2]
+    winner = np.bincount(codes, minlength=1 << (3 * QUANT_BITS)).argmax()
+    # Average the real pixels of the winning bucket for a truer colour
+    r, g, b = rgb[codes == winner].mean(axis=0).round().astype(int)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def compute_placeholder(path: Path) -> dict[str, str]:
+    """Return {"lqip": data URI, "color": "#rrggbb"} for `path`."""
+    from PIL import Image
+
+    with Image.open(path) as im:
+        # JPEG can decode straight to 1/8 scale, far cheaper than a full decode
+        im.draft("RGB", (THUMB_WIDTH * 8, THUMB_WIDTH * 8 * im.height // im.width))
+        small = im.convert("RGB")
+    small.thumbnail((THUMB_WIDTH * 4, THUMB_WIDTH * 4 * small.height // small.width))
+    color = dominant_color(small)
+
+    height = max(1, round(THUMB_WIDTH * small.height / small.width))
+    thumb = small.resize((THUMB_WIDTH, height), Image.BILINEAR)
+    buf = io.BytesIO()
+    thumb.save(buf, format="WEBP", quality=40)
+    lqip = "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+    return {"lqip": lqip, "color": color}
+
+
+class PlaceholderStore:
+    """Placeholders for one folder: from the manifest, else computed lazily."""
+
+    def __init__(self, folder: str | Path):
+        self._entries: dict[tuple[str, int], dict[str, str]] = {}
+        self._lock = threading.Lock()
+        manifest = load_manifest(folder) or {"assets": {}}
+        for name, entry in manifest["assets"].items():
+            if "placeholder" in entry:
+                self._entries[(name, entry["mtime_ns"])] = entry["placeholder"]
+
+    def get(self, path: Path, mtime_ns: int = 0) -> dict[str, str]:
+        key = (path.name, mtime_ns)
+        placeholder = self._entries.get(key)
+        if placeholder is None:
+            placeholder = compute_placeholder(path)
+            with self._lock:
+                self._entries[key] = placeholder
+        return placeholder
+
+
+@st.cache_resource(show_spinner=False)
+def get_placeholder_store(folder: str) -> PlaceholderStore:
+    return PlaceholderStore(folder)
+
+
+def placeholder_style(placeholder: dict[str, str]) -> str:
+    """Inline CSS that paints the placeholder behind an <img>."""
+    return (
+        f"background: {placeholder['color']} url({placeholder['lqip']}) center / cover no-repeat;"
+    )
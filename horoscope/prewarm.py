@@ -0,0 +1,141 @@
+"""Pre-warm each day's scheduled images before midnight traffic arrives.
+
+Content packs can swap a sign's image by date (see horoscope.content). A
+background thread wakes HOROSCOPE_PREWARM_LEAD seconds (default 300) before
+every local midnight and readies the next day's images:
+
+- builds missing size variants
+- loads the variants each layout would pick into the shared image cache
+- computes low-quality placeholders
+- re-indexes the asset folder, and the static asset server when it is used
+
+So the first visitors of the day get the new cards from warm caches. The
+current day is warmed once when the thread starts, and the next day right
+after it when the thread starts inside the lead window.
+
+    python -m horoscope.prewarm [--day YYYY-MM-DD] [--pack game] [folder]
+
+builds a day's variants ahead of time, e.g. from cron; caches are per process.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import streamlit as st
+
+from horoscope.cache import load_image_bytes
+from horoscope.content import ContentPack, PackStore, get_pack_store, load_pack, pack_path
+from horoscope.placeholders import get_placeholder_store
+from horoscope.registry import get_registry
+from horoscope.static import get_asset_server, static_mode
+from horoscope.variants import LayoutProfile, build_variants, pick_variant
+
+logger = logging.getLogger("horoscope.prewarm")
+
+PREWARM_LEAD = float(os.environ.get("HOROSCOPE_PREWARM_LEAD", "300"))
+
+
+def prewarm_day(
+    folder: str | os.PathLike,
+    pack: ContentPack,
+    day: date,
+    profiles: tuple[LayoutProfile, ...] = (),
+) -> dict[str, int]:
+    """Ready the images `pack` schedules for `day`; returns what was done."""
+    folder = Path(folder)
+    stats = {"images": 0, "variants_built": 0, "bytes_cached": 0}
+    for name in sorted(set(pack.images_on(day).values())):
+        path = folder / name
+        if not path.exists():
+            logger.warning("Scheduled image %s for %s is missing", path, day)
+            continue
+        stats["images"] += 1
+        stats["variants_built"] += len(build_variants(path))
+        mtime_ns = path.stat().st_mtime_ns
+        for profile in profiles:
+            for slot in profile.slots:
+                stats["bytes_cached"] += len(load_image_bytes(path, mtime_ns, pick_variant(path, slot, profile)))
+        get_placeholder_store(str(folder)).get(path, mtime_ns)
+
+    get_registry(str(folder), pack.order).invalidate()
+    if static_mode():
+        get_asset_server(str(folder)).refresh()
+    return stats
+
+
+def seconds_until_prewarm(now: datetime, lead: float = PREWARM_LEAD) -> float:
+    """Seconds from `now` until `lead` seconds before the next midnight;
+    zero or less when `now` is already inside that window.
+    """
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds() - lead
+
+
+class Prewarmer:
+    """Daemon thread running `prewarm_day` for tomorrow, shortly before midnight."""
+
+    def __init__(self, folder: str, store: PackStore, profiles: tuple[LayoutProfile, ...], lead: float = PREWARM_LEAD):
+        self.folder = folder
+        self.store = store
+        self.profiles = profiles
+        self.lead = lead
+        self.last: dict[str, object] = {}
+        self._thread = threading.Thread(target=self._run, name="horoscope-prewarm", daemon=True)
+
+    def start(self) -> "Prewarmer":
+        self._thread.start()
+        return self
+
+    def warm(self, day: date):
+        start = time.perf_counter()
+        try:
+            stats = prewarm_day(self.folder, self.store.current(), day, self.profiles)
+        except Exception:
+            logger.exception("Pre-warming %s failed", day)
+            return
+        self.last = {"day": day.isoformat(), **stats, "seconds": round(time.perf_counter() - start, 3)}
+        logger.info("Pre-warmed %s", self.last)
+
+    def _run(self):
+        self.warm(date.today())
+        warmed = None
+        while True:
+            now = datetime.now()
+            tomorrow = now.date() + timedelta(days=1)
+            wait = seconds_until_prewarm(now, self.lead)
+            if tomorrow == warmed:
+                wait += 86400  # tonight is done; wait for tomorrow night's window
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            self.warm(tomorrow)
+            warmed = tomorrow
+
+
+@st.cache_resource(show_spinner=False)
+def start_prewarmer(folder: str, pack: str, _profiles: tuple[LayoutProfile, ...]) -> Prewarmer:
+    """Start the pre-warm thread once per process and content pack."""
+    return Prewarmer(folder, get_pack_store(pack), _profiles).start()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-warm a day's scheduled images.")
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--pack", action="append", help="content pack name (default: game and game2)")
+    parser.add_argument("--day", type=date.fromisoformat, default=date.today() + timedelta(days=1))
+    args = parser.parse_args(argv)
+
+    for name in args.pack or ["game", "game2"]:
+        stats = prewarm_day(args.folder, load_pack(pack_path(name)), args.day)
+        print(f"{name} {args.day}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""Opt-in, per-session profiling of script runs.
+
+A session is profiled when its URL carries `?profile=<HOROSCOPE_PROFILE_TOKEN>`
+(the choice sticks for the rest of the session), or for every session when
+HOROSCOPE_PROFILE=1. One run is profiled at a time per process: a run that
+starts while another is being profiled is not profiled. cProfile can only be
+enabled once per process on Python 3.12+, where it also records every
+thread, so the .prof of a run includes what other sessions executed
+meanwhile. The .folded stacks sample only the profiled session's script
+thread, but the sampler takes the GIL every time it wakes. While a profiled
+run is in progress, every other session in the process therefore runs
+somewhat slower. A shorter interval gives finer flame graphs at a higher
+cost to those sessions.
+
+Each profiled run writes two files to HOROSCOPE_PROFILE_DIR (default
+`build/profiles/`), named `<app>-<session>-<run>`:
+
+    .prof    cProfile stats, for `python -m pstats` or snakeviz
+    .folded  sampled stacks in collapsed format, for flamegraph.pl or speedscope
+
+Sampling interval: HOROSCOPE_PROFILE_INTERVAL_MS (default 10).
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from horoscope import BUILD_DIR
+
+logger = logging.getLogger("horoscope.profiling")
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+PROFILE_ALL = os.environ.get("HOROSCOPE_PROFILE", "") == "1"
+PROFILE_TOKEN = os.environ.get("HOROSCOPE_PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("HOROSCOPE_PROFILE_DIR", os.path.join(BUILD_DIR, "profiles"))
+PROFILE_INTERVAL = float(os.environ.get("HOROSCOPE_PROFILE_INTERVAL_MS", "10")) / 1000
+QUERY_PARAM = "profile"
+
+# Held while a run is profiled; overlapping runs go unprofiled
+_PROFILE_LOCK = threading.Lock()
+
+
+def _query_param(name: str) -> str | None:
+    if hasattr(st, "query_params"):
+        return st.query_params.get(name)
+    values = st.experimental_get_query_params().get(name)
+    return values[0] if values else None
+
+
+def session_profiling() -> bool:
+    """Whether this session asked to be profiled."""
+    state = st.session_state
+    if "profiling" not in state:
+        state["profiling"] = PROFILE_ALL or bool(PROFILE_TOKEN and _query_param(QUERY_PARAM) == PROFILE_TOKEN)
+    return state["profiling"]
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer into collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="horoscope-profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str | os.PathLike):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def profiled(app: str):
+    """Decorate an app's `main` so profiled sessions write per-run profiles."""
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not session_profiling():
+                return func(*args, **kwargs)
+            if not _PROFILE_LOCK.acquire(blocking=False):
+                logger.info("Not profiling this %s run; another run is being profiled", app)
+                return func(*args, **kwargs)
+            try:
+                return _profile_run(app, func, *args, **kwargs)
+            finally:
+                _PROFILE_LOCK.release()
+
+        return wrapper
+
+    return decorate
+
+
+def _profile_run(app: str, func, *args, **kwargs):
+    """Run `func` under cProfile and the stack sampler and write both files."""
+    state = st.session_state
+    state["profile_runs"] = state.get("profile_runs", 0) + 1
+    ctx = get_script_run_ctx()
+    session = "".join(c for c in (ctx.session_id if ctx else "local") if c.isalnum())[:8]
+    out = Path(PROFILE_DIR)
+    out.mkdir(parents=True, exist_ok=True)
+    stem = out / f"{app}-{session}-{state['profile_runs']:04d}"
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    start = time.perf_counter()
+    try:
+        with sampler:
+            profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+    finally:
+        # Also reached on st.stop() and reruns; those runs are worth keeping
+        profiler.dump_stats(f"{stem}.prof")
+        sampler.write(f"{stem}.folded")
+        logger.info(
+            "Profiled %s run %d in %.1f ms -> %s.{prof,folded}",
+            app, state["profile_runs"], (time.perf_counter() - start) * 1000, stem,
+        )
+
@@ -0,0 +1,166 @@
+"""Process-wide registry of the image assets in a folder.
+
+The apps used to glob the folder on every rerun. The registry scans it once
+per process and afterwards rescans at most every `CHECK_INTERVAL` seconds,
+swapping in a new snapshot only when a file was added, removed or modified.
+Filesystem syscalls therefore scale with wall-clock time, not with clicks.
+
+Snapshots also index the `.variants/` folder, so picking a size variant
+at render time is a dictionary lookup rather than a stat per image.
+
+When the folder has an asset manifest (see horoscope/manifest.py) that is
+still fresh, snapshots are built from it and the folder is never listed.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import streamlit as st
+
+from horoscope.manifest import load_manifest, manifest_is_fresh
+from horoscope.variants import IMAGE_EXTENSIONS, VARIANT_DIR
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = float(os.environ.get("HOROSCOPE_ASSET_CHECK_INTERVAL", "2.0"))
+
+
+@dataclass(frozen=True)
+class AssetFile:
+    path: Path
+    size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class AssetSnapshot:
+    """Immutable view of the folder at one point in time."""
+    files: dict[str, AssetFile] = field(default_factory=dict)
+    zodiac: dict[str, Path] = field(default_factory=dict)
+    variants: dict[str, AssetFile] = field(default_factory=dict)
+
+    def get(self, filename: str) -> Path | None:
+        """Return the path of `filename` if it exists in the folder."""
+        asset = self.files.get(filename)
+        return asset.path if asset else None
+
+    def mtime_ns(self, path: Path) -> int:
+        asset = self.files.get(path.name)
+        return asset.mtime_ns if asset else 0
+
+    def has_variant(self, original: Path, variant: Path) -> bool:
+        """True when `variant` of `original` exists and is not older than it."""
+        built = self.variants.get(variant.name)
+        return built is not None and built.mtime_ns >= self.mtime_ns(original)
+
+
+def _snapshot(files: dict[str, AssetFile], names, variants: dict[str, AssetFile] | None = None) -> AssetSnapshot:
+    """Map zodiac names to files; for duplicates the later extension in
+    IMAGE_EXTENSIONS wins, as the old per-extension globs did.
+    """
+    zodiac = {}
+    by_priority = sorted(files.values(), key=lambda a: IMAGE_EXTENSIONS.index(a.path.suffix.lower()))
+    for asset in by_priority:
+        name = asset.path.stem.lower().strip()
+        if name in names:
+            zodiac[name] = asset.path
+    return AssetSnapshot(files=files, zodiac=zodiac, variants=variants or {})
+
+
+def scan_folder(folder: str | os.PathLike, names) -> AssetSnapshot:
+    """Scan `folder` once and map zodiac names to their image files.
+    Supports JPG, JPEG, PNG, WEBP formats.
+    """
+    folder_path = Path(folder)
+    files = _scan_images(folder_path)
+    if files is None:
+        return AssetSnapshot()
+    return _snapshot(files, names, _scan_images(folder_path / VARIANT_DIR) or {})
+
+
+def _scan_images(folder: Path) -> dict[str, AssetFile] | None:
+    """Image files directly in `folder` by name; None if it does not exist."""
+    files = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or Path(entry.name).suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                stat = entry.stat()
+                files[entry.name] = AssetFile(folder / entry.name, stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    return files
+
+
+def snapshot_from_manifest(folder: str | os.PathLike, names, manifest: dict) -> AssetSnapshot | None:
+    """Build a snapshot from `manifest`, or None if it no longer matches the disk."""
+    if not manifest_is_fresh(folder, manifest, variants=True):
+        return None
+    folder_path = Path(folder)
+    files = {
+        name: AssetFile(folder_path / name, entry["bytes"], entry["mtime_ns"])
+        for name, entry in manifest["assets"].items()
+    }
+    variants = {
+        name: AssetFile(folder_path / VARIANT_DIR / name, variant["bytes"], variant["mtime_ns"])
+        for entry in manifest["assets"].values()
+        for name, variant in entry["variants"].items()
+    }
+    return _snapshot(files, names, variants)
+
+
+class AssetRegistry:
+    """Thread-safe, lazily refreshed snapshot of one asset folder."""
+
+    def __init__(self, folder: str | os.PathLike, names, check_interval: float = CHECK_INTERVAL):
+        self.folder = Path(folder)
+        self.names = frozenset(names)
+        self.check_interval = check_interval
+        self.scans = 0
+        self.manifest = load_manifest(self.folder)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def snapshot(self) -> AssetSnapshot:
+        """Return the current snapshot, rescanning if the check interval passed."""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            # Another session may have refreshed while we waited
+            if self._snapshot is None or now - self._checked_at >= self.check_interval:
+                fresh = self._from_manifest()
+                if fresh is None:
+                    fresh = scan_folder(self.folder, self.names)
+                    self.scans += 1
+                if fresh != self._snapshot:
+                    self._snapshot = fresh
+                self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def _from_manifest(self) -> AssetSnapshot | None:
+        if self.manifest is None:
+            return None
+        snapshot = snapshot_from_manifest(self.folder, self.names, self.manifest)
+        if snapshot is None:
+            logger.info("Asset manifest in %s is stale, scanning the folder instead", self.folder)
+            self.manifest = None
+        return snapshot
+
+    def invalidate(self):
+        """Force a rescan on the next `snapshot()` call."""
+        with self._lock:
+            self._checked_at = 0.0
+
+
+@st.cache_resource(show_spinner=False)
+def get_registry(folder: str, names: tuple[str, ...]) -> AssetRegistry:
+    """Return the registry for `folder`, shared by every session."""
+    return AssetRegistry(folder, names)
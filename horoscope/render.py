@@ -0,0 +1,218 @@
+"""Rendering helpers shared by both horoscope apps."""
+from __future__ import annotations
+
+import html
+from pathlib import Path
+
+import streamlit as st
+
+from horoscope.cache import load_image_bytes
+from horoscope.media import shared_mode, shared_url
+from horoscope.placeholders import get_placeholder_store, placeholder_style
+from horoscope.static import AssetIndex, asset_url, base_url, get_asset_server, static_mode
+from horoscope.registry import AssetSnapshot
+from horoscope.variant_service import get_variant_service, lazy_variants
+from horoscope.variants import (
+    MOBILE_BREAKPOINT,
+    VARIANT_WIDTHS,
+    LayoutProfile,
+    pick_variant,
+    variant_for,
+    variant_path,
+)
+
+
+def show_image(
+    path: Path,
+    slot: str,
+    profile: LayoutProfile,
+    caption: str | None = None,
+    mtime_ns: int = 0,
+    assets: AssetSnapshot | None = None,
+):
+    """Show `path` in the `slot` image class using the best-sized variant.
+
+    In static asset mode this emits an `<img>` with a srcset of hashed URLs
+    and a low-quality placeholder painted behind it until it loads. In shared
+    mode the `<img>` points at the variant's process-wide media URL.
+    Missing variants are built on demand (see horoscope.variant_service).
+    Otherwise JPEG variants go through `st.image`, which re-encodes anything
+    else to JPEG and resizes anything wider than 1460px on every rerun. The
+    bytes come from the shared image cache, keyed by `mtime_ns`. Variants are
+    looked up in the registry snapshot `assets` when given, not on disk.
+    """
+    if static_mode():
+        markup = static_image_html(path, slot, profile, mtime_ns=mtime_ns)
+        if markup:
+            st.markdown(markup, unsafe_allow_html=True)
+            if caption:
+                st.caption(caption)
+            return
+
+    if shared_mode():
+        st.markdown(shared_image_html(path, slot, profile, mtime_ns=mtime_ns, assets=assets), unsafe_allow_html=True)
+        if caption:
+            st.caption(caption)
+        return
+
+    variant = best_variant(path, slot, profile, mtime_ns, assets)
+    st.image(
+        load_image_bytes(path, mtime_ns, variant),
+        use_container_width=True,
+        output_format="auto",
+        caption=caption,
+    )
+
+
+def best_variant(
+    path: Path,
+    slot: str,
+    profile: LayoutProfile,
+    mtime_ns: int = 0,
+    assets: AssetSnapshot | None = None,
+) -> Path:
+    """The JPEG variant to show, built on demand when lazy variants are on."""
+    if lazy_variants():
+        return get_variant_service().variant(path, slot, profile, mtime_ns=mtime_ns, assets=assets)
+    return pick_variant(path, slot, profile, fmt="jpeg", assets=assets)
+
+
+def static_image_sources(
+    path: Path,
+    slot: str,
+    profile: LayoutProfile,
+    mtime_ns: int = 0,
+) -> dict | None:
+    """Return the hashed URLs of `path` as src/srcset/webp/sizes/width/height,
+    plus the inline `placeholder` style. None means the asset is not published.
+    """
+    server = get_asset_server(str(path.parent))
+    original = server.lookup(path, mtime_ns)
+    if original is None:
+        return None
+    placeholder = get_placeholder_store(str(path.parent)).get(path, original.mtime_ns)
+    return index_image_sources(server.index, path, slot, profile, base_url(), placeholder)
+
+
+def index_image_sources(
+    index: AssetIndex,
+    path: Path,
+    slot: str,
+    profile: LayoutProfile,
+    base: str,
+    placeholder: dict[str, str] | None = None,
+) -> dict | None:
+    """`static_image_sources` for any published index, with URLs under `base`."""
+    original = index.get(path)
+    if original is None:
+        return None
+
+    def srcset(fmt: str) -> str:
+        entries = []
+        for width in VARIANT_WIDTHS:
+            asset = index.get(variant_path(path, width, fmt))
+            if asset is not None:
+                entries.append(f"{asset_url(asset, base)} {width}w")
+        if fmt == path.suffix.lower().lstrip(".").replace("jpg", "jpeg"):
+            entries.append(f"{asset_url(original, base)} {original.size[0]}w")
+        return ", ".join(entries)
+
+    desktop, mobile = profile.slots.get(slot, (1.0, 1.0))
+
+    # Fallback src: the same variant the st.image path would have used
+    wanted = variant_for(path, slot, profile, fmt="jpeg")
+    fallback = (index.get(wanted) if wanted is not None else None) or original
+    return {
+        "placeholder": placeholder_style(placeholder) if placeholder else "",
+        "src": asset_url(fallback, base),
+        "srcset": srcset("jpeg"),
+        "webp": srcset("webp"),
+        "sizes": f"(max-width: {MOBILE_BREAKPOINT - 1}px) {mobile * 100:g}vw, {desktop * 100:g}vw",
+        "width": original.size[0],
+        "height": original.size[1],
+    }
+
+
+def static_image_html(
+    path: Path,
+    slot: str,
+    profile: LayoutProfile,
+    mtime_ns: int = 0,
+    alt: str | None = None,
+) -> str:
+    """Return a `<picture>` for `path` pointing at its content-hashed URLs.
+    An empty string means the asset is not published.
+    """
+    sources = static_image_sources(path, slot, profile, mtime_ns)
+    if sources is None:
+        return ""
+    return picture_html(sources, slot, alt if alt is not None else path.stem.title())
+
+
+def picture_html(sources: dict, slot: str, alt: str) -> str:
+    """Render the output of `index_image_sources` as a `<picture>`."""
+    webp = sources["webp"]
+    return (
+        "<picture>"
+        + (f'<source type="image/webp" srcset="{webp}" sizes="{sources["sizes"]}">' if webp else "")
+        + f'<img class="{slot}" src="{sources["src"]}" srcset="{sources["srcset"]}" '
+        f'sizes="{sources["sizes"]}" width="{sources["width"]}" height="{sources["height"]}" '
+        f'style="height: auto; {sources["placeholder"]}" alt="{html.escape(alt)}" decoding="async">'
+        "</picture>"
+    )
+
+
+def shared_image_html(
+    path: Path,
+    slot: str,
+    profile: LayoutProfile,
+    mtime_ns: int = 0,
+    alt: str | None = None,
+    holder: str | None = None,
+    assets: AssetSnapshot | None = None,
+) -> str:
+    """Return an `<img>` for the best-sized variant of `path` in the shared
+    media store. `holder` names the reference this session keeps (default `slot`).
+    """
+    variant = best_variant(path, slot, profile, mtime_ns, assets)
+    url = shared_url(variant, mtime_ns, holder or slot)
+    placeholder = placeholder_style(get_placeholder_store(str(path.parent)).get(path, mtime_ns))
+    alt_text = html.escape(alt if alt is not None else path.stem.title())
+    return (
+        f'<img class="{slot}" src="{url}" style="height: auto; {placeholder}" '
+        f'alt="{alt_text}" decoding="async">'
+    )
+
+
+def prefetch_images(
+    paths: list[Path],
+    slot: str,
+    profile: LayoutProfile,
+    assets: AssetSnapshot | None = None,
+):
+    """Let the browser fetch `paths` in the background so showing them later
+    is a cache hit. The hidden pictures use the same srcset and sizes as
+    `show_image`, so the browser picks the very same candidate URL.
+    Only possible with stable URLs: static or shared asset mode.
+    """
+    if not paths:
+        return
+    if static_mode():
+        pictures = [static_image_html(path, slot, profile, alt="") for path in paths]
+    elif shared_mode():
+        pictures = [
+            shared_image_html(
+                path, slot, profile,
+                mtime_ns=assets.mtime_ns(path) if assets else 0,
+                alt="", holder=f"prefetch-{i}", assets=assets,
+            )
+            for i, path in enumerate(paths)
+        ]
+    else:
+        return
+    pictures = [p.replace("<img ", '<img fetchpriority="low" ', 1) for p in pictures if p]
+    if pictures:
+        st.markdown(
+            f'<div style="display: none;" aria-hidden="true">{"".join(pictures)}</div>',
+            unsafe_allow_html=True,
+        )
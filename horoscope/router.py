@@ -0,0 +1,139 @@
+"""Callback-driven navigation for the landing → main → end flow.
+
+Buttons pass `router.fire` as their `on_click` callback. Streamlit runs the
+callback before the script, so the click's effect is visible in that same run
+and no `st.rerun()` is needed: one interaction, one script run.
+
+Every transition is logged at INFO on the "horoscope.router" logger together
+with the number of script runs the previous interaction cost (run the app
+with HOROSCOPE_LOG_LEVEL=INFO to see them), and the totals are kept in
+`st.session_state["router_stats"]`.
+
+`Router.fragment` scopes a region to `st.fragment`: clicks whose callbacks
+only move between signs rerun that region instead of the whole script.
+Streamlit versions without fragments run it as part of the full script.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Callable, Sequence
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from horoscope.metrics import get_metrics, record_run
+from horoscope.profiling import profiled
+
+logger = logging.getLogger("horoscope.router")
+
+PAGES = ("landing", "main", "end")
+
+# st.fragment from 1.37, st.experimental_fragment in 1.33-1.36
+_st_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+# (page, event) -> next page
+TRANSITIONS = {
+    ("landing", "enter"): "main",
+    ("main", "learn_more"): "end",
+    ("main", "prev"): "main",
+    ("main", "next"): "main",
+    ("main", "pick"): "main",
+    ("end", "return"): "main",
+}
+
+
+def fragment_run() -> bool:
+    """True while only a fragment reruns, i.e. `main` was skipped."""
+    ctx = get_script_run_ctx()
+    return ctx is not None and bool(getattr(ctx, "fragment_ids_this_run", None))
+
+
+class Router:
+    """Session-state backed page state machine."""
+
+    def __init__(
+        self,
+        order: Sequence[str] | Callable[[], Sequence[str]],
+        initial_sign: str = "aries",
+        transitions=TRANSITIONS,
+    ):
+        # A callable is asked on every event, so a swapped content pack applies
+        self._order = order
+        self.initial_sign = initial_sign
+        self.transitions = transitions
+
+    def init_state(self):
+        state = st.session_state
+        if "page" not in state:
+            state["page"] = "landing"
+        if "picked_sign" not in state:
+            state["picked_sign"] = self.initial_sign
+        if state["picked_sign"] not in self.order:
+            state["picked_sign"] = self.order[0]
+        if "router_stats" not in state:
+            state["router_stats"] = {"events": 0, "runs": 0, "runs_since_event": 0}
+
+    @property
+    def order(self) -> Sequence[str]:
+        return self._order() if callable(self._order) else self._order
+
+    @property
+    def page(self) -> str:
+        return st.session_state["page"]
+
+    def begin_run(self):
+        """Count a script run; call once at the top of every run."""
+        stats = st.session_state["router_stats"]
+        stats["runs"] += 1
+        stats["runs_since_event"] += 1
+
+    def fragment(self, app: str):
+        """Decorate a region whose widgets only fire sign events (prev, next,
+        pick) so their clicks rerun just that region. Fragment-only runs are
+        counted and profiled like full runs, since `main` does not run for
+        them; the region must re-read any per-run state itself.
+        """
+
+        def decorate(func):
+            profiled_func = profiled(app)(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if fragment_run():
+                    record_run(app)
+                    self.begin_run()
+                    return profiled_func(*args, **kwargs)
+                return func(*args, **kwargs)
+
+            return _st_fragment(wrapper) if _st_fragment else wrapper
+
+        return decorate
+
+    def fire(self, event: str, sign: str | None = None):
+        """Apply `event` to the current page. Meant for `on_click`."""
+        state = st.session_state
+        page = state["page"]
+        target = self.transitions.get((page, event))
+        if target is None:
+            logger.warning("Ignoring event %r on page %r", event, page)
+            return
+
+        if event in ("prev", "next"):
+            step = -1 if event == "prev" else 1
+            order = self.order
+            # A sign dropped by a swapped content pack restarts at the first sign
+            current = order.index(state["picked_sign"]) if state["picked_sign"] in order else -step
+            state["picked_sign"] = order[(current + step) % len(order)]
+        elif event == "pick" and sign in self.order:
+            state["picked_sign"] = sign
+
+        stats = state["router_stats"]
+        logger.info(
+            "%s --%s--> %s (sign=%s, previous interaction cost %d run(s))",
+            page, event, target, state["picked_sign"], stats["runs_since_event"],
+        )
+        stats["events"] += 1
+        get_metrics().inc("horoscope_router_events_total", page=page, event=event)
+        stats["runs_since_event"] = 0
+        state["page"] = target
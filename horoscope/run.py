@@ -0,0 +1,46 @@
+"""Per-run state of the game pages.
+
+app.py imports game and game2 once per process, so their module globals are
+shared by every session the process serves. Whatever a script run renders
+from (content pack, image snapshot, today's cards) is therefore read into a
+`RunContext` at the start of the run and handed to the page functions,
+instead of being kept at module level where a concurrent session's run
+could replace it halfway through.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Mapping
+
+from horoscope.content import ContentPack, content_pack
+from horoscope.metrics import timed
+from horoscope.registry import AssetSnapshot, get_registry
+
+
+@dataclass(frozen=True)
+class RunContext:
+    content: ContentPack
+    assets: AssetSnapshot
+    found: Mapping[str, Path]  # sign -> today's card
+    sources: Mapping[str, str]  # sign -> today's source link
+
+
+def load_run(folder: str, pack: str, today: date | None = None) -> RunContext:
+    """Read the content pack, the image snapshot and today's cards."""
+    # Shared, pre-validated content pack; swapped in place when its file changes
+    content = content_pack(pack)
+
+    # Look up images through the shared, process-wide registry
+    with timed("assets"):
+        assets = get_registry(folder, content.order).snapshot()
+
+    # Today's cards: scheduled images and sources override the defaults
+    today = today or date.today()
+    found = dict(assets.zodiac)
+    for sign, name in content.images_on(today).items():
+        scheduled = assets.get(name)
+        if scheduled:
+            found[sign] = scheduled
+    return RunContext(content, assets, found, content.sources_on(today))
@@ -0,0 +1,133 @@
+"""One sprite sheet of sign thumbnails for game2's selector grid.
+
+Giving each of the 12 grid buttons its own thumbnail would cost 12 image
+requests. `build_sprite` packs every sign's card into one horizontal WebP
+strip (drawn at 2x for high-DPI screens) and returns a CSS offset map
+that adds the artwork to each button:
+
+    .st-key-zodiac_aries button::before { background-position: -0px 0; ... }
+
+At runtime the sheet is built once per process and set of cards. In static
+asset mode it is then published under a content-hashed, immutable URL, so
+the whole grid costs one cached request. Other modes keep the text-only
+buttons, because they have no URL the browser may cache indefinitely.
+
+    python -m horoscope.sprites [folder] [--pack game2] [--out DIR]
+
+writes `zodiac-sprite.<hash>.webp` and `zodiac-sprite.css` to
+`<folder>/build/` (HOROSCOPE_BUILD_DIR) for a CDN or the static export. Not to
+`.variants/`, whose images are indexed, packed and published as card sizes.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import streamlit as st
+
+from horoscope import BUILD_DIR
+from horoscope.registry import AssetSnapshot
+from horoscope.static import HASH_LENGTH, asset_url, get_asset_server, static_mode
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+THUMB_SIZE = (48, 60)  # CSS pixels; the cards are 4:5
+THUMB_SCALE = 2
+SPRITE_QUALITY = 80
+BUTTON_KEY = "zodiac_{sign}"
+
+
+@dataclass(frozen=True)
+class Sprite:
+    data: bytes
+    digest: str
+    offsets: dict[str, int]  # sign -> x offset in CSS pixels
+
+    @property
+    def name(self) -> str:
+        return f"zodiac-sprite.{self.digest[:HASH_LENGTH]}.webp"
+
+    def css(self, url: str) -> str:
+        """The offset map: one rule per sign's button, plus the shared tile."""
+        width, height = THUMB_SIZE
+        selectors = ",".join(f".st-key-{BUTTON_KEY.format(sign=s)} button::before" for s in self.offsets)
+        rules = [
+            f'{selectors}{{content:"";display:block;width:{width}px;height:{height}px;'
+            f"margin:0 auto .25rem;border-radius:6px;background:url({url}) no-repeat;"
+            f"background-size:{width * len(self.offsets)}px {height}px}}"
+        ]
+        for sign, x in self.offsets.items():
+            rules.append(f".st-key-{BUTTON_KEY.format(sign=sign)} button::before{{background-position:-{x}px 0}}")
+        return "".join(rules)
+
+
+def build_sprite(images: Mapping[str, Path], order: Sequence[str]) -> Sprite:
+    """Pack the card of every sign in `order` that has one into a strip."""
+    from PIL import Image, ImageOps
+
+    signs = [s for s in order if s in images]
+    width, height = THUMB_SIZE[0] * THUMB_SCALE, THUMB_SIZE[1] * THUMB_SCALE
+    sheet = Image.new("RGB", (width * max(len(signs), 1), height))
+    for i, sign in enumerate(signs):
+        with Image.open(images[sign]) as card:
+            # Let the JPEG decoder downscale by DCT before the exact resize
+            card.draft("RGB", (width, height))
+            thumb = ImageOps.fit(card.convert("RGB"), (width, height), Image.LANCZOS)
+        sheet.paste(thumb, (i * width, 0))
+
+    buf = io.BytesIO()
+    sheet.save(buf, format="WEBP", quality=SPRITE_QUALITY, method=6)
+    data = buf.getvalue()
+    return Sprite(data, hashlib.sha256(data).hexdigest(), {s: i * THUMB_SIZE[0] for i, s in enumerate(signs)})
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _cached_sprite(key: tuple[tuple[str, str, int], ...], order: tuple[str, ...]) -> Sprite:
+    return build_sprite({sign: Path(path) for sign, path, _ in key}, order)
+
+
+def sprite_style(
+    folder: str,
+    images: Mapping[str, Path],
+    order: Sequence[str],
+    assets: AssetSnapshot,
+) -> str:
+    """`<style>` giving the grid buttons their thumbnails, or "" when the
+    sheet cannot be served from an immutable URL. The cards' versions come
+    from the registry snapshot `assets`, so no file is touched per run.
+    """
+    if not static_mode() or not images:
+        return ""
+    key = tuple((s, str(p), assets.mtime_ns(p)) for s, p in sorted(images.items()))
+    sprite = _cached_sprite(key, tuple(order))
+    asset = get_asset_server(folder).publish_bytes("zodiac-sprite", ".webp", sprite.data)
+    return f"<style>{sprite.css(asset_url(asset))}</style>"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the selector grid's sprite sheet and CSS.")
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--pack", default="game2", help="content pack giving the sign order")
+    parser.add_argument("--out", help=f"output folder (default: <folder>/{BUILD_DIR})")
+    args = parser.parse_args(argv)
+
+    from horoscope.content import load_pack, pack_path
+    from horoscope.registry import scan_folder
+
+    pack = load_pack(pack_path(args.pack))
+    sprite = build_sprite(scan_folder(args.folder, pack.order).zodiac, pack.order)
+    out = Path(args.out) if args.out else Path(args.folder) / BUILD_DIR
+    out.mkdir(parents=True, exist_ok=True)
+    (out / sprite.name).write_bytes(sprite.data)
+    (out / "zodiac-sprite.css").write_text(sprite.css(sprite.name), encoding="utf-8")
+    print(f"wrote {out / sprite.name} ({len(sprite.data) / 1024:.1f} KB, {len(sprite.offsets)} sign(s)) and zodiac-sprite.css")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
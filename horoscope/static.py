@@ -0,0 +1,299 @@
+"""Content-hashed, immutable asset URLs served outside Streamlit's media store.
+
+With HOROSCOPE_ASSET_MODE=static every image in the asset folder (and its
+`.variants/`, plus generated files such as the stylesheet) is published as `/a/<stem>.<sha256-prefix><suffix>` by a small
+threaded HTTP server started once per process. Responses carry
+`Cache-Control: public, max-age=31536000, immutable` and a strong ETag, so
+browsers and reverse proxies can keep them across sessions and deploys.
+
+Settings:
+    HOROSCOPE_ASSET_MODE      "media" (default, st.image), "static", or
+                              "shared" (see horoscope.media)
+    HOROSCOPE_ASSET_BIND      interface for the asset server (default 0.0.0.0)
+    HOROSCOPE_ASSET_PORT      port for the asset server (default 8600)
+    HOROSCOPE_ASSET_BASE_URL  public URL prefix, e.g. https://cdn.example.org
+                              (default: the page's scheme and host on
+                              HOROSCOPE_ASSET_PORT)
+
+The same tree can be written out for nginx or a CDN with::
+
+    python -m horoscope.static publish OUT_DIR [folder]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import mimetypes
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import streamlit as st
+
+from horoscope.assetpack import packed_bytes
+from horoscope.cache import get_image_cache
+from horoscope.manifest import load_manifest, manifest_is_fresh
+from horoscope.variants import VARIANT_DIR, iter_images
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+
+ASSET_MODE = os.environ.get("HOROSCOPE_ASSET_MODE", "media").lower()
+ASSET_BIND = os.environ.get("HOROSCOPE_ASSET_BIND", "0.0.0.0")
+ASSET_PORT = int(os.environ.get("HOROSCOPE_ASSET_PORT", "8600"))
+ASSET_BASE_URL = os.environ.get("HOROSCOPE_ASSET_BASE_URL", "").rstrip("/")
+
+URL_PREFIX = "/a/"
+HASH_LENGTH = 16
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def static_mode() -> bool:
+    return ASSET_MODE == "static"
+
+# =============================
+# ----- Publishing -----
+# =============================
+
+@dataclass(frozen=True)
+class PublishedAsset:
+    source: Path
+    name: str  # hashed file name, e.g. "aries.3f2a9c0d1b7e4a55.jpeg"
+    digest: str
+    mtime_ns: int
+    size: tuple[int, int]  # pixel (width, height)
+
+
+@dataclass(frozen=True)
+class AssetIndex:
+    """Maps source names (relative to the folder) to their published assets."""
+    by_source: dict[str, PublishedAsset] = field(default_factory=dict)
+    by_name: dict[str, PublishedAsset] = field(default_factory=dict)
+
+    def get(self, path: Path) -> PublishedAsset | None:
+        return self.by_source.get(_relative_name(path))
+
+
+def _relative_name(path: Path) -> str:
+    if path.parent.name == VARIANT_DIR:
+        return f"{VARIANT_DIR}/{path.name}"
+    return path.name
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_index(folder: str | os.PathLike, previous: AssetIndex | None = None) -> AssetIndex:
+    """Hash every image (and variant) in `folder`.
+    Files whose mtime did not change since `previous` are not re-hashed.
+    """
+    from PIL import Image
+
+    sources = iter_images(folder) + iter_images(Path(folder) / VARIANT_DIR)
+    by_source = {}
+    for path in sources:
+        rel = _relative_name(path)
+        mtime_ns = path.stat().st_mtime_ns
+        old = previous.by_source.get(rel) if previous else None
+        if old is not None and old.mtime_ns == mtime_ns:
+            by_source[rel] = old
+            continue
+        digest = file_digest(path)
+        with Image.open(path) as im:
+            size = im.size
+        name = f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix.lower()}"
+        by_source[rel] = PublishedAsset(path, name, digest, mtime_ns, size)
+    return AssetIndex(by_source, {a.name: a for a in by_source.values()})
+
+
+def index_from_manifest(folder: str | os.PathLike, manifest: dict) -> AssetIndex | None:
+    """Build the index from the asset manifest without hashing or listing
+    anything; None if the manifest does not match the disk any more.
+    """
+    if not manifest_is_fresh(folder, manifest, variants=True):
+        return None
+    folder_path = Path(folder)
+    by_source = {}
+    for name, entry in manifest["assets"].items():
+        files = [(name, folder_path / name, entry)]
+        files += [
+            (f"{VARIANT_DIR}/{v}", folder_path / VARIANT_DIR / v, e)
+            for v, e in entry["variants"].items()
+        ]
+        for rel, path, info in files:
+            hashed = f"{path.stem}.{info['sha256'][:HASH_LENGTH]}{path.suffix.lower()}"
+            by_source[rel] = PublishedAsset(
+                path, hashed, info["sha256"], info["mtime_ns"], (info["width"], info["height"])
+            )
+    return AssetIndex(by_source, {a.name: a for a in by_source.values()})
+
+
+def publish(folder: str | os.PathLike, out_dir: str | os.PathLike) -> AssetIndex:
+    """Copy every asset to `out_dir` under its hashed name."""
+    index = build_index(folder)
+    target = Path(out_dir) / URL_PREFIX.strip("/")
+    target.mkdir(parents=True, exist_ok=True)
+    for asset in index.by_name.values():
+        dest = target / asset.name
+        if not dest.exists():
+            shutil.copyfile(asset.source, dest)
+    return index
+
+# =============================
+# ----- Asset server -----
+# =============================
+
+class _AssetHandler(BaseHTTPRequestHandler):
+    server: "AssetServer"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool):
+        path = self.path.split("?", 1)[0]
+        name = path[len(URL_PREFIX):] if path.startswith(URL_PREFIX) else ""
+        asset = self.server.index.by_name.get(name)
+        blob = self.server.blobs.get(name)
+        if asset is None and blob is None:
+            self.send_error(404)
+            return
+        if blob is not None:
+            asset, data = blob
+
+        etag = f'"{asset.digest}"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self._common_headers(etag)
+            self.end_headers()
+            return
+
+        if blob is None:
+            # Slices of the mapped asset pack go to the socket without a copy
+            data = packed_bytes(asset.source, asset.mtime_ns)
+            if data is None:
+                data = self.server.cache.get_or_load(
+                    (str(asset.source), asset.mtime_ns, asset.source.name), asset.source.read_bytes
+                )
+        self.send_response(200)
+        self._common_headers(etag)
+        self.send_header("Content-Type", mimetypes.guess_type(asset.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def _common_headers(self, etag: str):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", IMMUTABLE)
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AssetServer(ThreadingHTTPServer):
+    """Serves the current AssetIndex; `refresh` swaps in a new one atomically."""
+    daemon_threads = True
+
+    def __init__(self, folder: str | os.PathLike, address: tuple[str, int]):
+        super().__init__(address, _AssetHandler)
+        self.folder = folder
+        manifest = load_manifest(folder)
+        self.index = (manifest and index_from_manifest(folder, manifest)) or build_index(folder)
+        self.cache = get_image_cache()
+        self.blobs: dict[str, tuple[PublishedAsset, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> AssetIndex:
+        with self._lock:
+            self.index = build_index(self.folder, self.index)
+            return self.index
+
+    def lookup(self, path: Path, mtime_ns: int = 0) -> PublishedAsset | None:
+        """Return the published asset for `path`, re-indexing if it changed."""
+        asset = self.index.get(path)
+        if asset is None or (mtime_ns and asset.mtime_ns != mtime_ns):
+            asset = self.refresh().get(path)
+        return asset
+
+    def publish_bytes(self, stem: str, suffix: str, data: bytes) -> PublishedAsset:
+        """Serve generated `data` (e.g. a stylesheet) under a hashed name."""
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{stem}.{digest[:HASH_LENGTH]}{suffix}"
+        blob = self.blobs.get(name)
+        if blob is None:
+            blob = (PublishedAsset(Path(name), name, digest, 0, (0, 0)), data)
+            self.blobs[name] = blob
+        return blob[0]
+
+    def start(self) -> "AssetServer":
+        threading.Thread(target=self.serve_forever, name="horoscope-assets", daemon=True).start()
+        return self
+
+
+@st.cache_resource(show_spinner=False)
+def get_asset_server(folder: str) -> AssetServer:
+    """Start the asset server once per process."""
+    return AssetServer(folder, (ASSET_BIND, ASSET_PORT)).start()
+
+
+def base_url() -> str:
+    """Public URL prefix for published assets.
+
+    Without HOROSCOPE_ASSET_BASE_URL this is the page's host on ASSET_PORT,
+    with the page's scheme (from X-Forwarded-Proto behind a proxy, else the
+    Origin header) so that an https page does not load mixed content. The
+    asset server speaks plain HTTP, so an https page needs TLS in front of
+    ASSET_PORT too, or a base URL pointing at the proxy or CDN.
+    """
+    if ASSET_BASE_URL:
+        return ASSET_BASE_URL
+    host, scheme = "localhost", "http"
+    context = getattr(st, "context", None)
+    if context is not None:
+        headers = context.headers
+        host = headers.get("Host", host).rsplit(":", 1)[0] or host
+        forwarded = headers.get("X-Forwarded-Proto", "").split(",")[0].strip().lower()
+        origin = headers.get("Origin", "").split("://", 1)[0].lower()
+        scheme = next((s for s in (forwarded, origin) if s in ("http", "https")), scheme)
+    return f"{scheme}://{host}:{ASSET_PORT}"
+
+
+def asset_url(asset: PublishedAsset, base: str | None = None) -> str:
+    return f"{base if base is not None else base_url()}{URL_PREFIX}{asset.name}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Publish or serve content-hashed assets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="copy hashed assets into a directory")
+    pub.add_argument("out_dir")
+    pub.add_argument("folder", nargs="?", default=".")
+    srv = sub.add_parser("serve", help="run the asset server in the foreground")
+    srv.add_argument("folder", nargs="?", default=".")
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        index = publish(args.folder, args.out_dir)
+        print(f"published {len(index.by_name)} asset(s) to {args.out_dir}")
+    else:
+        server = AssetServer(args.folder, (ASSET_BIND, ASSET_PORT))
+        print(f"serving {len(server.index.by_name)} asset(s) on {ASSET_BIND}:{ASSET_PORT}")
+        server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""Stylesheet build step: minify once, inline only the critical rules.
+
+`STARFIELD_CSS` and `MOBILE_FRIENDLY_CSS` are ~10 KB each and used to be sent
+through `st.markdown` on every rerun. `compile_stylesheet` minifies a sheet
+once per process and splits it into a small critical part (page chrome that
+must not flash unstyled) and the rest. In static asset mode the rest is
+published as a content-hashed, immutable `.css` file that each browser loads
+once; otherwise the whole minified sheet is inlined.
+
+Inspect the split with::
+
+    python -m horoscope.styles game.py game2.py
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+from dataclasses import dataclass
+
+import streamlit as st
+
+from horoscope.static import asset_url, get_asset_server, static_mode
+
+# Rules needed for the first paint: background, layout, sidebar, headings
+CRITICAL_SELECTORS = (
+    "[data-testid=",
+    "h1", "h2", "h3",
+    ".header-glass", ".kicker", ".small",
+    ".landing-container", ".landing-title", ".landing-subtitle",
+)
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_SPACE = re.compile(r"\s+")
+_AROUND = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace."""
+    css = css.replace("<style>", "").replace("</style>", "")
+    css = _COMMENT.sub("", css)
+    css = _SPACE.sub(" ", css)
+    css = _AROUND.sub(r"\1", css)
+    # Spaces after ':' are never needed; before it they can be (descendant :hover)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def _rules(css: str) -> list[tuple[str, str]]:
+    """Split minified CSS into top-level (prelude, body) pairs."""
+    rules, depth, start, prelude = [], 0, 0, ""
+    for i, ch in enumerate(css):
+        if ch == "{":
+            if depth == 0:
+                prelude, start = css[start:i], i + 1
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:i]))
+                start = i + 1
+    return rules
+
+
+def _is_critical(selector_list: str) -> bool:
+    return all(
+        sel.strip().startswith(CRITICAL_SELECTORS)
+        for sel in selector_list.split(",")
+    )
+
+
+def split_critical(css: str) -> tuple[str, str]:
+    """Return (critical, deferred) halves of minified `css`."""
+    critical, deferred = [], []
+    for prelude, body in _rules(css):
+        if prelude.startswith("@media"):
+            inner_critical, inner_deferred = split_critical(body)
+            if inner_critical:
+                critical.append(f"{prelude}{{{inner_critical}}}")
+            if inner_deferred:
+                deferred.append(f"{prelude}{{{inner_deferred}}}")
+        elif _is_critical(prelude):
+            critical.append(f"{prelude}{{{body}}}")
+        else:
+            deferred.append(f"{prelude}{{{body}}}")
+    return "".join(critical), "".join(deferred)
+
+
+@dataclass(frozen=True)
+class Stylesheet:
+    full: str
+    critical: str
+    deferred: str
+    digest: str
+
+
+@st.cache_resource(show_spinner=False)
+def compile_stylesheet(css: str) -> Stylesheet:
+    """Minify and split `css`; done once per distinct sheet per process."""
+    full = minify_css(css)
+    critical, deferred = split_critical(full)
+    return Stylesheet(full, critical, deferred, hashlib.sha256(full.encode()).hexdigest())
+
+
+def inject_stylesheet(css: str, folder: str = "."):
+    """Emit `css` for this run: critical rules inline, the rest by URL."""
+    sheet = compile_stylesheet(css)
+    if static_mode() and sheet.deferred:
+        asset = get_asset_server(folder).publish_bytes("styles", ".css", sheet.deferred.encode())
+        st.markdown(
+            f'<style>{sheet.critical}</style><link rel="stylesheet" href="{asset_url(asset)}">',
+            unsafe_allow_html=True,
+        )
+    else:
+        st.markdown(f"<style>{sheet.full}</style>", unsafe_allow_html=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Report the critical/deferred CSS split of the apps.")
+    parser.add_argument("apps", nargs="*", default=["game.py", "game2.py"])
+    args = parser.parse_args(argv)
+
+    import importlib
+
+    for app in args.apps:
+        module = importlib.import_module(app.removesuffix(".py"))
+        css = getattr(module, "STARFIELD_CSS", None) or getattr(module, "MOBILE_FRIENDLY_CSS")
+        full = minify_css(css)
+        critical, deferred = split_critical(full)
+        print(f"{app}: {len(css)} B source, {len(full)} B minified, "
+              f"{len(critical)} B inline, {len(deferred)} B cached file")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
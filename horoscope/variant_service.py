@@ -0,0 +1,185 @@
+"""Build missing image variants on demand, off the script thread.
+
+`pick_variant` only returns derivatives that already exist, so a freshly
+deployed card is shown from its 2500x3125 original until someone runs
+`python -m horoscope.variants`. The variant service resizes on demand
+instead:
+
+- decoding and resizing run on a process pool, so the GIL-bound script
+  threads only wait on a future
+- concurrent requests for the same (asset, width, format) share one
+  in-flight job
+- results are written to the `.variants/` folder, which doubles as the
+  on-disk cache across reruns, restarts and worker processes
+
+A cold start therefore costs one resize per variant, not one per session.
+A request that waits longer than HOROSCOPE_VARIANT_WAIT seconds (default 10)
+is shown from the original while the job finishes in the background.
+
+Settings:
+    HOROSCOPE_VARIANT_WORKERS  pool processes (default min(4, CPUs); 0 turns
+                               on-demand building off)
+    HOROSCOPE_VARIANT_WAIT     seconds a script run waits for a variant
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import streamlit as st
+
+from horoscope.registry import AssetSnapshot
+from horoscope.variants import LayoutProfile, build_variant, pick_width, variant_for, variant_path
+
+logger = logging.getLogger("horoscope.variant_service")
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+VARIANT_WORKERS = int(os.environ.get("HOROSCOPE_VARIANT_WORKERS", str(min(4, os.cpu_count() or 1))))
+VARIANT_WAIT = float(os.environ.get("HOROSCOPE_VARIANT_WAIT", "10"))
+
+JobKey = tuple[str, int, int, str]
+
+
+def _build(path: str, width: int, fmt: str) -> str:
+    """Pool entry point; module-level so it pickles."""
+    return str(build_variant(Path(path), width, fmt))
+
+
+def _fresh(variant: Path, mtime_ns: int) -> bool:
+    """True when `variant` exists and is not older than its source."""
+    try:
+        return variant.stat().st_mtime_ns >= mtime_ns
+    except OSError:
+        return False
+
+
+class VariantService:
+    """Single-flight front of a process pool that writes variants to disk."""
+
+    def __init__(self, workers: int, wait: float = VARIANT_WAIT):
+        self.workers = workers
+        self.wait = wait
+        self.disk_hits = 0
+        self.jobs = 0
+        self.joined = 0
+        self.failures = 0
+        self._inflight: dict[JobKey, Future] = {}
+        self._widths: dict[tuple[str, int], int] = {}
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a threaded server process is not safe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def request(self, path: Path, width: int, fmt: str, mtime_ns: int = 0) -> Future:
+        """Return a future of the variant's path, starting a job only if
+        neither the disk nor an in-flight job already has it.
+        """
+        target = variant_path(path, width, fmt)
+        if _fresh(target, mtime_ns):
+            self.disk_hits += 1
+            done: Future = Future()
+            done.set_result(target)
+            return done
+        key = (str(path), mtime_ns, width, fmt)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.joined += 1
+                return future
+            self.jobs += 1
+            job = self._executor().submit(_build, str(path), width, fmt)
+            future = Future()
+            self._inflight[key] = future
+
+        def finish(job: Future):
+            error = job.exception()
+            with self._lock:
+                self._inflight.pop(key, None)
+                if isinstance(error, BrokenProcessPool) and self._pool is not None:
+                    # A crashed worker breaks the whole pool; start a new one next time
+                    self._pool.shutdown(wait=False)
+                    self._pool = None
+            if error is not None:
+                self.failures += 1
+                logger.warning("Building %s failed: %s", target, error)
+                future.set_exception(error)
+            else:
+                future.set_result(Path(job.result()))
+
+        job.add_done_callback(finish)
+        return future
+
+    def variant(
+        self,
+        path: Path,
+        slot: str,
+        profile: LayoutProfile,
+        fmt: str = "jpeg",
+        mtime_ns: int = 0,
+        assets: AssetSnapshot | None = None,
+    ) -> Path:
+        """`pick_variant`, building the variant first when it is missing.
+        With `assets`, built variants are found in that registry snapshot, so
+        the disk is only touched on a miss. Falls back to the original on
+        timeout, error, or when the original is not wider than the variant.
+        """
+        target = variant_for(path, slot, profile, fmt)
+        if target is None:
+            return path
+        built = assets.has_variant(path, target) if assets is not None else _fresh(target, mtime_ns)
+        if built:
+            self.disk_hits += 1
+            return target
+        width = pick_width(profile.target_width(slot))
+        if self._source_width(path, mtime_ns) <= width:
+            return path
+        try:
+            return self.request(path, width, fmt, mtime_ns).result(timeout=self.wait)
+        except Exception:  # includes the wait timing out
+            return path
+
+    def _source_width(self, path: Path, mtime_ns: int) -> int:
+        """Pixel width of `path`, remembered per version so it is read once."""
+        key = (str(path), mtime_ns)
+        width = self._widths.get(key)
+        if width is None:
+            from PIL import Image
+
+            try:
+                with Image.open(path) as image:
+                    width = image.size[0]
+            except OSError:
+                width = 0
+            self._widths[key] = width
+        return width
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "jobs": self.jobs,
+                "joined": self.joined,
+                "disk_hits": self.disk_hits,
+                "failures": self.failures,
+                "inflight": len(self._inflight),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_variant_service() -> VariantService:
+    """Return the process-wide variant service."""
+    return VariantService(VARIANT_WORKERS)
+
+
+def lazy_variants() -> bool:
+    return VARIANT_WORKERS > 0
@@ -0,0 +1,192 @@
+"""Width-stepped image derivatives for the 2500x3125 horoscope cards.
+
+Build them once with::
+
+    python -m horoscope.variants [folder]
+
+Variants are written next to the originals in a `.variants/` folder, e.g.
+`.variants/aries-960w.webp`. At render time `pick_variant` chooses the
+smallest variant that still covers the CSS box of the image, falling back to
+the original file when no derivative exists yet. Pass the registry snapshot
+to look the variant up there instead of on disk.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from horoscope.registry import AssetSnapshot
+
+# =============================
+# ----- Config & Constants -----
+# =============================
+
+VARIANT_WIDTHS = (480, 960, 1440)
+VARIANT_FORMATS = ("webp", "jpeg")
+VARIANT_DIR = ".variants"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Encoder settings per output format
+SAVE_OPTIONS = {
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+}
+
+MOBILE_BREAKPOINT = 768
+
+
+@dataclass(frozen=True)
+class LayoutProfile:
+    """How wide each image class is drawn, and the client we draw it for.
+
+    `slots` maps a CSS class (e.g. "horoscope-image") to its width as a
+    fraction of the viewport on (desktop, mobile), mirroring the app's CSS.
+    """
+    name: str
+    slots: dict[str, tuple[float, float]] = field(default_factory=dict)
+    viewport_width: int = 1440
+    dpr: float = 1.0
+
+    def target_width(self, slot: str) -> int:
+        """Return the number of device pixels the image is drawn at."""
+        desktop, mobile = self.slots.get(slot, (1.0, 1.0))
+        fraction = mobile if self.viewport_width < MOBILE_BREAKPOINT else desktop
+        return int(round(fraction * self.viewport_width * self.dpr))
+
+# =============================
+# ----- Variant lookup -----
+# =============================
+
+def variant_path(path: Path, width: int, fmt: str) -> Path:
+    """Return where the `width`-pixel `fmt` derivative of `path` lives."""
+    return path.parent / VARIANT_DIR / f"{path.stem}-{width}w.{fmt}"
+
+
+def pick_width(target: int, widths: tuple[int, ...] = VARIANT_WIDTHS) -> int | None:
+    """Return the smallest variant width covering `target` pixels.
+    None means only the original is wide enough.
+    """
+    for width in sorted(widths):
+        if width >= target:
+            return width
+    return None
+
+
+def variant_for(path: Path, slot: str, profile: LayoutProfile, fmt: str = "jpeg") -> Path | None:
+    """Return the variant `slot` wants for `profile`, built or not.
+    None means only the original is wide enough.
+    """
+    width = pick_width(profile.target_width(slot))
+    return variant_path(path, width, fmt) if width is not None else None
+
+
+def pick_variant(
+    path: Path,
+    slot: str,
+    profile: LayoutProfile,
+    fmt: str = "jpeg",
+    assets: AssetSnapshot | None = None,
+) -> Path:
+    """Return the best existing file to show `path` in `slot` for `profile`.
+    With `assets` the variant is looked up in that snapshot, not on disk.
+    """
+    candidate = variant_for(path, slot, profile, fmt)
+    if candidate is None:
+        return path
+    exists = assets.has_variant(path, candidate) if assets is not None else candidate.exists()
+    return candidate if exists else path
+
+# =============================
+# ----- Variant building -----
+# =============================
+
+def build_variants(
+    path: Path,
+    widths: tuple[int, ...] = VARIANT_WIDTHS,
+    formats: tuple[str, ...] = VARIANT_FORMATS,
+    force: bool = False,
+) -> list[Path]:
+    """Write every missing derivative of `path` and return their paths.
+    Widths at or above the original width are skipped.
+    """
+    from PIL import Image
+
+    written = []
+    with Image.open(path) as original:
+        src_width, src_height = original.size
+        todo = [
+            (width, fmt)
+            for width in widths
+            for fmt in formats
+            if width < src_width and (force or not variant_path(path, width, fmt).exists())
+        ]
+        if not todo:
+            return written
+
+        # Let the JPEG decoder downscale by DCT for the largest width we need
+        largest = max(width for width, _ in todo)
+        original.draft("RGB", (largest, largest * src_height // src_width))
+        image = original.convert("RGB")
+
+    for width, fmt in todo:
+        height = round(src_height * width / src_width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        written.append(_save_atomic(resized, variant_path(path, width, fmt), fmt))
+    return written
+
+
+def build_variant(path: Path, width: int, fmt: str) -> Path:
+    """Write the single `width`-pixel `fmt` derivative of `path`."""
+    from PIL import Image
+
+    with Image.open(path) as original:
+        src_width, src_height = original.size
+        height = round(src_height * width / src_width)
+        original.draft("RGB", (width, height))
+        image = original.convert("RGB")
+    resized = image.resize((width, height), Image.LANCZOS)
+    return _save_atomic(resized, variant_path(path, width, fmt), fmt)
+
+
+def _save_atomic(image, target: Path, fmt: str) -> Path:
+    """Save so that readers never see a half-written file."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    image.save(tmp, **SAVE_OPTIONS[fmt])
+    os.replace(tmp, target)
+    return target
+
+
+def iter_images(folder: str | os.PathLike) -> list[Path]:
+    """Return all source images directly inside `folder`."""
+    folder_path = Path(folder)
+    if not folder_path.is_dir():
+        return []
+    return sorted(
+        p for p in folder_path.iterdir()
+        if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+    )
+
+
+def build_all(folder: str | os.PathLike, force: bool = False) -> dict[str, list[Path]]:
+    """Build derivatives for every image in `folder`."""
+    return {p.name: build_variants(p, force=force) for p in iter_images(folder)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build width-stepped image variants.")
+    parser.add_argument("folder", nargs="?", default=".", help="folder with the source images")
+    parser.add_argument("--force", action="store_true", help="rebuild existing variants")
+    args = parser.parse_args(argv)
+
+    for name, written in build_all(args.folder, force=args.force).items():
+        print(f"{name}: {len(written)} variant(s) written")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())